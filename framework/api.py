@@ -1,46 +1,162 @@
-import json
+from typing import TYPE_CHECKING
 
-import allure
-from requests import request
-from requests.auth import HTTPBasicAuth
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
 
+from framework.helpers.collection_state import CollectionState, tracked_request
 from framework.helpers.credentials import Credentials
+from framework.helpers.reporting import step
+from framework.helpers.retry import RetryPolicy, call_with_retry
 from framework.helpers.simple_response import SimpleResponse
+from framework.helpers.streaming import StreamedResponse
+from framework.helpers.timing import RequestTiming, instrument_adapter
+from framework.metrics import get_registry
+
+if TYPE_CHECKING:
+    from framework.helpers.cache import ResponseCache
+    from framework.helpers.cassette import Cassette
+
+
+class _PrecomputedBasicAuth(AuthBase):
+    """
+    Basic-авторизация с заранее вычисленным заголовком (без пересборки на каждый запрос)
+    """
+
+    def __init__(self, header):
+        self.header = header
+
+    def __call__(self, prepared_request):
+        prepared_request.headers["Authorization"] = self.header
+        return prepared_request
 
 
 class API:
     """
-    Класс для работы с API, логирование работы методов через Allure
+    Класс для работы с API, логирование работы методов через Allure.
+    Объект держит долгоживущую сессию с пулом keep-alive соединений, поэтому по окончании работы
+    его нужно закрыть методом close()
     """
 
     _service_address = "http://rest.test.ivi.ru/v2/"
     _credentials = None
+    _session = None
+    _adapter = None
+    cache = None
+    retry = None
+    state = None
 
-    def __init__(self):
+    def __init__(self, pool_size: int = 10, service_address: str = None, cache: "ResponseCache" = None,
+                 cassette: "Cassette" = None, retry: RetryPolicy = None, state: CollectionState = None):
+        """
+        :param cache: кеш ответов на GET запросы (по умолчанию не используется)
+        :param cassette: кассета для записи запросов или воспроизведения ответов без сети (по умолчанию не используется)
+        :param retry: политика повторов запросов при временных ошибках (по умолчанию запросы не повторяются)
+        :param state: состояние коллекции, в котором отмечаются запросы на изменение данных (по умолчанию не ведется)
+        """
         self._credentials = Credentials()
+        if service_address:
+            self._service_address = service_address
+        self.cache = cache
+        self.retry = retry
+        self.state = state
+        with step("Create pooled transport (pool size = {})", pool_size):
+            if cassette is None:
+                self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            else:
+                # Кеш и кассета используются только с опциями, их модули загружаются при первом использовании
+                from framework.helpers.cassette import CassetteAdapter
+                self._adapter = CassetteAdapter(cassette, pool_connections=1, pool_maxsize=pool_size)
+            instrument_adapter(self._adapter)
+            self._session = Session()
+            self._session.mount("http://", self._adapter)
+            self._session.mount("https://", self._adapter)
+            self._session.auth = _PrecomputedBasicAuth(self._credentials.basic_auth_header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with step("Close pooled transport"):
+            self._session.close()
+
+    def connection_stats(self) -> dict:
+        """
+        Счетчики переиспользования соединений пула: сколько открыто соединений, сколько выполнено запросов
+        и сколько запросов ушло по уже открытому соединению
+        """
+        pools = self._adapter.poolmanager.pools
+        connections = requests = 0
+        for key in pools.keys():
+            pool = pools[key]
+            connections += pool.num_connections
+            requests += pool.num_requests
+        return {"connections": connections, "requests": requests, "reused": requests - connections}
 
     def auth_request(self, request_type, api_method, **kwargs):
-        with allure.step(f"Execute {request_type.upper()} {api_method.upper()} with {kwargs}"):
-            with allure.step("Create full URL address"):
-                url = self._service_address + api_method
-            with allure.step(f"Execute '{request_type.upper()}' request to '{url}' "
-                             f"with HTTPBasicAuth and args: {kwargs}"):
-                response = request(method=request_type, url=url,
-                                   auth=HTTPBasicAuth(self._credentials.login, self._credentials.password),
-                                   **kwargs)
-            with allure.step(f"Transform response to SimpleResponse (custom type)"):
-                # Сатус коды для преобразования контента могут быть дополненены
-                return SimpleResponse(status_code=response.status_code,
-                                      time=response.elapsed.total_seconds(),
-                                      headers=dict(response.headers),
-                                      content=json.loads(response.text) if (response.text
-                                                                            and response.status_code not in [414, ])
-                                      else response.text)
+        if self.state is None:
+            return self._cached_request(request_type, api_method, **kwargs)
+        return tracked_request(self.state, request_type, api_method,
+                               lambda: self._cached_request(request_type, api_method, **kwargs))
+
+    def _cached_request(self, request_type, api_method, **kwargs):
+        if self.cache is None:
+            return self._request(request_type, api_method, **kwargs)
+        from framework.helpers.cache import cached_request
+        return cached_request(self.cache, request_type, api_method, kwargs,
+                              lambda: self._request(request_type, api_method, **kwargs))
+
+    def _send(self, request_type, api_method, **kwargs):
+        """
+        Выполнить запрос с повторами и замером этапов: (ответ requests, RequestTiming)
+        """
+        with step("Create full URL address"):
+            url = self._service_address + api_method
+        with step("Execute '{}' request to '{}' with HTTPBasicAuth and args: {}", request_type.upper(), url, kwargs):
+            try:
+                with RequestTiming() as timing:
+                    response = call_with_retry(self.retry, request_type, api_method,
+                                               lambda: self._session.request(method=request_type, url=url, **kwargs))
+            except Exception as error:
+                metrics = get_registry()
+                if metrics is not None:
+                    metrics.record_error(request_type, api_method, error)
+                raise
+            return response, timing
+
+    @staticmethod
+    def _record_metrics(request_type, api_method, response, timing: RequestTiming, bytes_received: int):
+        metrics = get_registry()
+        if metrics is not None:
+            metrics.record_request(request_type, api_method, response.status_code, timing.total,
+                                   bytes_sent=len(response.request.body or b""), bytes_received=bytes_received)
+
+    def _request(self, request_type, api_method, **kwargs):
+        with step("Execute {} {} with {}", request_type.upper(), api_method.upper(), kwargs):
+            response, timing = self._send(request_type, api_method, **kwargs)
+            self._record_metrics(request_type, api_method, response, timing, len(response.content))
+            with step("Transform response to SimpleResponse (custom type)"):
+                # Тело ответа преобразуется из json только при обращении к content
+                return SimpleResponse.from_response(response, timing)
 
     # GET
     def get_all_characters(self, **kwargs) -> SimpleResponse:
         return self.auth_request("GET", "characters", **kwargs)
 
+    def stream_all_characters(self, on_record=(), **kwargs) -> StreamedResponse:
+        """
+        GET /characters с потоковым разбором тела ответа: записи возвращаются по одной при итерации по ответу
+        """
+        with step("Execute streamed GET CHARACTERS with {}", kwargs):
+            response, timing = self._send("GET", "characters", stream=True, **kwargs)
+            # Метрики запроса записываются после получения всего тела ответа (или закрытия ответа)
+            return StreamedResponse(response, key="result", on_record=on_record, timing=timing,
+                                    on_close=lambda streamed: self._record_metrics("GET", "characters", response,
+                                                                                   timing, streamed.bytes_received))
+
     def get_character_by_name(self, name) -> SimpleResponse:
         return self.auth_request("GET", "character", params={"name": name})
 
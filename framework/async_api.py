@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from framework.api import API
+from framework.helpers.reporting import step
+from framework.helpers.simple_response import SimpleResponse
+
+
+class AsyncAPI:
+    """
+    Асинхронный двойник класса API: те же методы и те же SimpleResponse, но запросы можно выполнять конкурентно.
+    Запросы уходят через пул соединений объекта API, число одновременных запросов ограничено семафором.
+
+    Пример (синхронный тест):
+        responses = async_api.run(async_api.gather(*[async_api.get_character_by_name(name) for name in names]))
+    Пример (тест 'async def', выполняется в своем цикле событий, см. pytest_pyfunc_call в tests/conftest.py):
+        responses = await async_api.gather(*[async_api.get_character_by_name(name) for name in names])
+    """
+
+    _api = None
+    _own_api = False
+    _executor = None
+    _semaphore = None
+    _semaphore_loop = None
+
+    def __init__(self, concurrency: int = 10, api: API = None, service_address: str = None, cache=None,
+                 cassette=None, retry=None, state=None):
+        self.concurrency = concurrency
+        with step("Create AsyncAPI (concurrency = {})", concurrency):
+            self._own_api = api is None
+            self._api = API(pool_size=concurrency, service_address=service_address, cache=cache,
+                            cassette=cassette, retry=retry, state=state) if self._own_api else api
+            self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="async_api")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        with step("Close AsyncAPI"):
+            self._executor.shutdown(wait=True)
+            if self._own_api:
+                self._api.close()
+
+    @property
+    def api(self) -> API:
+        return self._api
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Семафор привязан к циклу событий, поэтому для каждого нового цикла создается свой
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def auth_request(self, request_type, api_method, **kwargs) -> SimpleResponse:
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor,
+                                              partial(self._api.auth_request, request_type, api_method, **kwargs))
+
+    @staticmethod
+    async def gather(*coroutines, return_exceptions: bool = False) -> list:
+        """
+        :param return_exceptions: вернуть исключения запросов в списке результатов (иначе пробрасывается первое)
+        """
+        return list(await asyncio.gather(*coroutines, return_exceptions=return_exceptions))
+
+    @staticmethod
+    def run(coroutine):
+        """
+        Выполнить корутину из синхронного кода (например, из теста или фикстуры).
+        В тестах 'async def' цикл событий уже запущен: корутины в них ожидаются через await
+        """
+        return asyncio.run(coroutine)
+
+    # GET
+    async def get_all_characters(self, **kwargs) -> SimpleResponse:
+        return await self.auth_request("GET", "characters", **kwargs)
+
+    async def get_character_by_name(self, name) -> SimpleResponse:
+        return await self.auth_request("GET", "character", params={"name": name})
+
+    # POST
+    async def post_character(self, character_data: dict) -> SimpleResponse:
+        return await self.auth_request("POST", "character", json=character_data)
+
+    async def post_reset_collection(self) -> SimpleResponse:
+        return await self.auth_request("POST", "reset")
+
+    # PUT
+    async def put_character(self, character_data: dict) -> SimpleResponse:
+        return await self.auth_request("PUT", "character", json=character_data)
+
+    # DELETE
+    async def delete_character_by_name(self, name) -> SimpleResponse:
+        return await self.auth_request("DELETE", "character", params={"name": name})
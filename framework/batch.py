@@ -0,0 +1,113 @@
+from itertools import product
+from typing import TYPE_CHECKING
+
+import pytest
+
+from framework.helpers.reporting import step
+from framework.helpers.simple_response import SimpleResponse
+
+if TYPE_CHECKING:
+    from framework.async_api import AsyncAPI
+
+"""
+Пакетное выполнение параметризованных случаев: таблица строк параметров и функция, которая строит запрос по строке.
+Таблица используется как декоратор теста (параметризация по строкам + метка 'batch'). При первом обращении
+к ответу любого случая запросы всех выбранных случаев таблицы отправляются одновременно через AsyncAPI,
+а каждый тест (отдельный случай pytest и allure) проверяет только свой ответ.
+
+Пример:
+    BAD_NAMES = RequestBatch("bad_name, expected_status_code", [("", 400), ("A" * 2 ** 16, 414)],
+                             request=lambda api, test_data, bad_name, expected_status_code:
+                             api.get_character_by_name(bad_name))
+
+    @BAD_NAMES
+    def test_bad_name(self, batched_response, bad_name, expected_status_code):
+        check.status_code(batched_response.status_code, expected_status_code)
+"""
+
+
+def _param_id(value, argname, index) -> str:
+    # Так же, как id значения параметра строится в pytest: строки и числа как есть (не-ASCII символы pytest
+    # экранирует и в заданных id), остальное - имя параметра и номер значения
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, complex)) or value is None:
+        return str(value)
+    return f"{argname}{index}"
+
+
+class RequestBatch:
+    """
+    Класс таблицы случаев. request(async_api, test_data, **параметры строки) возвращает корутину запроса AsyncAPI.
+    Запросы случаев не должны зависеть друг от друга (порядок их выполнения не определен)
+    """
+
+    def __init__(self, argnames, rows: list, request, ids=None):
+        self.argnames = tuple(name.strip() for name in argnames.split(",")) if isinstance(argnames, str) \
+            else tuple(argnames)
+        self.rows = list(rows)
+        self.request = request
+        self.ids = ids
+        self._responses = {}
+        self._executed = False
+
+    @classmethod
+    def nested(cls, argnames, values: list, request) -> "RequestBatch":
+        """
+        Таблица всех сочетаний значений values (список значений для каждого имени argnames), равная вложенным
+        декораторам parametrize (первое имя - внешний декоратор): тот же порядок случаев и те же id тестов
+        """
+        argnames = [name.strip() for name in argnames.split(",")] if isinstance(argnames, str) else list(argnames)
+        rows, ids = [], []
+        # Значения внутреннего декоратора меняются медленнее и стоят в id первыми
+        for combination in product(*[list(enumerate(items)) for items in reversed(values)]):
+            rows.append(tuple(value for _, value in reversed(combination)))
+            ids.append("-".join(_param_id(value, name, index)
+                                for (index, value), name in zip(combination, reversed(argnames))))
+        return cls(argnames, rows, request, ids=ids)
+
+    def __call__(self, function):
+        function = pytest.mark.parametrize(",".join(self.argnames), self.rows, ids=self.ids)(function)
+        return pytest.mark.batch(self)(function)
+
+    def _params(self, index) -> dict:
+        row = self.rows[index]
+        return dict(zip(self.argnames, row if len(self.argnames) > 1 else (row, )))
+
+    def index(self, params: dict) -> int:
+        """
+        Номер строки таблицы по параметрам случая pytest
+        """
+        for index in range(len(self.rows)):
+            if self._params(index) == {name: params[name] for name in self.argnames}:
+                return index
+        raise LookupError(f"No row of the batch matches params {params}")
+
+    def execute(self, async_api: "AsyncAPI", test_data, indexes) -> dict:
+        """
+        Отправить запросы строк indexes одновременно: {номер строки: ответ или исключение}
+        """
+        indexes = list(indexes)
+        with step("Execute batch of {} requests (up to {} at once)", len(indexes), async_api.concurrency):
+            results = async_api.run(async_api.gather(*[self.request(async_api, test_data, **self._params(index))
+                                                       for index in indexes], return_exceptions=True))
+        return dict(zip(indexes, results))
+
+    def response(self, async_api: "AsyncAPI", test_data, params: dict, selected=None) -> SimpleResponse:
+        """
+        Ответ для случая с параметрами params. При первом обращении одновременно отправляются запросы всех случаев
+        selected (параметры выбранных случаев таблицы, по умолчанию - все строки).
+        Ответ выдается один раз: при повторном запуске случая (например, --reruns) запрос отправляется заново
+        """
+        index = self.index(params)
+        if index not in self._responses:
+            indexes = {index}
+            if not self._executed:
+                indexes |= {self.index(item) for item in selected} if selected is not None \
+                    else set(range(len(self.rows)))
+                self._executed = True
+            self._responses.update(self.execute(async_api, test_data, sorted(indexes)))
+        result = self._responses.pop(index)
+        if isinstance(result, BaseException):
+            raise result
+        return result
@@ -0,0 +1,100 @@
+import json
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from framework.helpers.reporting import step
+from framework.helpers.stats import LatencyHistogram
+
+"""
+Замеры задержек методов API: каждый метод выполняется N раз после прогрева,
+задержки накапливаются в гистограмме, результаты прогона сохраняются в JSON файл
+"""
+
+PHASES = ("acquire", "connect", "send", "first_byte", "download", "decode")
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Структура с результатами замеров одного метода API.
+    elapsed - время прогона измеряемых итераций по часам (от начала первой до конца последней, вместе с before/after)
+    """
+    name: str
+    iterations: int
+    warmup: int
+    elapsed: float = 0.0
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    status_codes: Counter = field(default_factory=Counter)
+    phases: dict = field(default_factory=dict)
+
+    def record_phases(self, timing):
+        """
+        Накопить длительности этапов запроса (RequestTiming) в отдельных гистограммах
+        """
+        if timing is None:
+            return
+        for phase in PHASES:
+            histogram = self.phases.get(phase)
+            if histogram is None:
+                histogram = self.phases[phase] = LatencyHistogram()
+            histogram.record(getattr(timing, phase))
+
+    @property
+    def throughput(self) -> float:
+        # Запросов в секунду за время прогона, а не 1 / средняя задержка
+        return self.histogram.count / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        return {"name": self.name,
+                "iterations": self.iterations,
+                "warmup": self.warmup,
+                "elapsed": self.elapsed,
+                "throughput": self.throughput,
+                "latency": self.histogram.summary(percentiles=(50, 90, 99)),
+                "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+                "phases": {phase: histogram.summary(percentiles=(50, 90, 99))
+                           for phase, histogram in self.phases.items()},
+                "histogram": self.histogram.buckets()}
+
+
+def run_benchmark(name, call, iterations: int = 100, warmup: int = 10, before=None, after=None) -> BenchmarkResult:
+    """
+    Выполнить call(index) warmup + iterations раз и замерить задержки (без учета прогрева).
+    before(index) и after(index) выполняются вокруг каждого вызова и в замер не входят
+    """
+    with step("Benchmark '{}' ({} iterations, {} warmup)", name, iterations, warmup):
+        result = BenchmarkResult(name=name, iterations=iterations, warmup=warmup)
+        measured_from = None
+        for index in range(warmup + iterations):
+            if index == warmup:
+                measured_from = time.perf_counter()
+            if before:
+                before(index)
+            started = time.perf_counter()
+            response = call(index)
+            latency = time.perf_counter() - started
+            if after:
+                after(index)
+            if index >= warmup:
+                result.histogram.record(latency)
+                result.status_codes[response.status_code] += 1
+                result.record_phases(getattr(response, "timing", None))
+        if measured_from is not None:
+            result.elapsed = time.perf_counter() - measured_from
+        return result
+
+
+def write_results(results: list, directory, metadata: dict = None) -> str:
+    """
+    Сохранить результаты прогона в файл <directory>/benchmark_<время запуска>.json. Возвращает путь к файлу
+    """
+    with step("Write benchmark results to '{}'", directory):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"metadata": metadata or {}, "results": [result.to_dict() for result in results]}, file,
+                      indent=2)
+        return path
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from copy import deepcopy
+
+from framework.helpers.reporting import step
+
+"""
+Кеш ответов на идемпотентные GET запросы. Любой запрос на изменение данных сбрасывает кеш целиком
+"""
+
+
+class ResponseCache:
+    """
+    Класс кеша ответов с ограничением по времени жизни записи (ttl, секунды) и по числу записей (max_size).
+    При переполнении вытесняется запись, которая дольше всех не использовалась.
+    Ответы отдаются копиями, поэтому изменение полученного из кеша ответа не меняет сам кеш
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 128):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._strict = 0
+        self._generation = 0
+
+    @staticmethod
+    def key(request_type, api_method, kwargs) -> str:
+        return json.dumps([request_type.upper(), api_method, kwargs], sort_keys=True, default=str)
+
+    @property
+    def is_strict(self) -> bool:
+        return self._strict > 0
+
+    @contextmanager
+    def strict(self):
+        """
+        Строгий режим: кеш не используется (например, для тестов, которые замеряют время ответа сервиса)
+        """
+        with self._lock:
+            self._strict += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._strict -= 1
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            response = item[1]
+        return deepcopy(response)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def put(self, key, response, generation=None):
+        """
+        :param generation: поколение кеша на момент отправки запроса. Если за время запроса кеш был сброшен,
+                           ответ может быть устаревшим и не сохраняется
+        """
+        response = deepcopy(response)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[key] = (time.monotonic(), response)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
+
+    def __repr__(self):
+        return f"ResponseCache(ttl={self.ttl}, max_size={self.max_size}, {self.stats()})"
+
+
+def cached_request(cache: ResponseCache, request_type, api_method, kwargs, execute):
+    """
+    Выполнить запрос через кеш: GET читается из кеша (если не включен строгий режим),
+    остальные методы выполняются всегда и сбрасывают кеш
+    """
+    if request_type.upper() != "GET":
+        try:
+            return execute()
+        finally:
+            cache.invalidate()
+    if cache.is_strict:
+        return execute()
+    key = cache.key(request_type, api_method, kwargs)
+    response = cache.get(key)
+    if response is not None:
+        with step("Get response from cache"):
+            return response
+    generation = cache.generation
+    response = execute()
+    cache.put(key, response, generation)
+    return response
@@ -0,0 +1,185 @@
+import base64
+import io
+import json
+import os
+import threading
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from framework.helpers.reporting import step
+
+"""
+Запись пар запрос/ответ в файл (кассету) и воспроизведение ответов из кассеты без обращения к сети
+"""
+
+RECORD = "record"
+REPLAY = "replay"
+MODES = (RECORD, REPLAY)
+MATCH_FIELDS = ("method", "path", "params", "body")
+
+
+class CassetteError(LookupError):
+    """
+    В кассете нет ответа на запрос (режим воспроизведения)
+    """
+
+
+class Cassette:
+    """
+    Класс кассеты: список пар запрос/ответ в порядке выполнения.
+    Запросы сравниваются по полям match_on (метод, путь, параметры строки запроса, тело).
+    Одинаковые запросы воспроизводятся в порядке записи: первый запрос получает первый записанный ответ и т.д.,
+    после последнего записанного ответа повторяется последний
+    """
+
+    def __init__(self, path, mode: str = REPLAY, match_on=MATCH_FIELDS, metadata: dict = None):
+        """
+        :param metadata: параметры прогона, которые сохраняются в кассете (например, зерно тестовых данных),
+                         при воспроизведении читаются из файла
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}")
+        unknown = set(match_on) - set(MATCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown cassette match fields {sorted(unknown)}, expected some of {MATCH_FIELDS}")
+        self.path = path
+        self.mode = mode
+        self.match_on = tuple(match_on)
+        self.metadata = dict(metadata or {})
+        self.interactions = []
+        self._by_key = {}
+        self._played = {}
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            self.load()
+
+    @property
+    def is_replay(self) -> bool:
+        return self.mode == REPLAY
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def key(self, request: dict) -> str:
+        return json.dumps([request[field] for field in self.match_on], sort_keys=True)
+
+    def record(self, request: dict, response: dict):
+        with self._lock:
+            self.interactions.append({"request": request, "response": response})
+            self._by_key.setdefault(self.key(request), []).append(response)
+
+    def play(self, request: dict) -> dict:
+        key = self.key(request)
+        with self._lock:
+            responses = self._by_key.get(key)
+            if not responses:
+                matched = {field: request[field] for field in self.match_on}
+                raise CassetteError(f"No recorded response in cassette '{self.path}' for request {matched}")
+            position = self._played.get(key, 0)
+            self._played[key] = position + 1
+            return responses[min(position, len(responses) - 1)]
+
+    def load(self):
+        with step("Load cassette '{}'", self.path):
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+            interactions = data["interactions"]
+            self.metadata = data.get("metadata", {})
+            self.interactions = []
+            self._by_key = {}
+            self._played = {}
+            for interaction in interactions:
+                self.record(interaction["request"], interaction["response"])
+
+    def save(self):
+        with step("Save cassette '{}' ({} interactions)", self.path, len(self.interactions)):
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                data = {"match_on": list(self.match_on), "metadata": self.metadata,
+                        "interactions": list(self.interactions)}
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False, indent=1)
+
+
+def read_metadata(path) -> dict:
+    """
+    Параметры прогона из файла кассеты (пустой словарь, если файла нет)
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file).get("metadata", {})
+    except FileNotFoundError:
+        return {}
+
+
+def _request_fields(request) -> dict:
+    url = urlsplit(request.url)
+    body = request.body
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False)
+        except ValueError:
+            pass
+    return {"method": request.method.upper(),
+            "path": url.path,
+            "params": sorted(parse_qsl(url.query, keep_blank_values=True)),
+            "body": body or None}
+
+
+def _response_fields(response) -> dict:
+    try:
+        body, encoding = response.content.decode("utf-8"), None
+    except UnicodeDecodeError:
+        body, encoding = base64.b64encode(response.content).decode("ascii"), "base64"
+    return {"status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "body": body,
+            "body_encoding": encoding,
+            "elapsed": response.elapsed.total_seconds()}
+
+
+def _build_response(request, fields: dict) -> Response:
+    response = Response()
+    response.status_code = fields["status_code"]
+    response.reason = fields.get("reason")
+    response.headers = CaseInsensitiveDict(fields["headers"])
+    response.encoding = get_encoding_from_headers(response.headers)
+    body = fields["body"]
+    content = base64.b64decode(body) if fields.get("body_encoding") == "base64" else body.encode("utf-8")
+    response.raw = io.BytesIO(content)
+    response._content = content
+    response._content_consumed = True
+    response.url = request.url
+    response.request = request
+    response.elapsed = timedelta(seconds=fields.get("elapsed", 0.0))
+    return response
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Транспорт requests с кассетой: в режиме записи запросы уходят в сеть, а пары запрос/ответ сохраняются в кассету,
+    в режиме воспроизведения ответы берутся из кассеты и сеть не используется
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        fields = _request_fields(request)
+        if self.cassette.is_replay:
+            return _build_response(request, self.cassette.play(fields))
+        response = super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        # Тело читается сразу (и для потоковых запросов), иначе его нечего записать в кассету
+        self.cassette.record(fields, _response_fields(response))
+        return response
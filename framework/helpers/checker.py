@@ -1,20 +1,27 @@
+import json
+import time
+
 import allure
-from cerberus import Validator
-from hamcrest import assert_that, equal_to, less_than_or_equal_to, is_not, is_, contains_string, is_in, not_
+
+from framework.helpers.reporting import step
+from framework.helpers.schemas import SchemaRegistry
+from framework.metrics import get_registry
 
 
 class Checker:
     """
-    Класс для работы с проверками различных объектов и логирования эттго процесса
+    Класс для работы с проверками различных объектов и логирования эттго процесса.
+    hamcrest импортируется в методах: он загружается при первой проверке, а не при сборе тестов
     """
 
     @staticmethod
     def headers(headers: dict, expected_headers: dict):
-        with allure.step("Check headers"):
-            with allure.step("Allowed headers"):
+        from hamcrest import assert_that, is_in, not_
+        with step("Check headers"):
+            with step("Allowed headers"):
                 for header in expected_headers.items():
                     assert_that(header, is_in(list(headers.items())), f"Wrong header: {header}")
-            with allure.step("Check deprecated headers"):
+            with step("Check deprecated headers"):
                 deprecated_headers_list = ["X-Powered-By", ]
                 for deprecated_header in deprecated_headers_list:
                     assert_that(deprecated_header, not_(is_in(list(headers.keys()))),
@@ -22,43 +29,101 @@ class Checker:
 
     @staticmethod
     def status_code(current_status_code, expected_status_code):
-        with allure.step(f"Check status code (expect [{expected_status_code}])"):
+        from hamcrest import assert_that, equal_to
+        with step("Check status code (expect [{}])", expected_status_code):
             assert_that(current_status_code, equal_to(expected_status_code), "Wrong status code!")
 
     @staticmethod
     def object_schema(checking_object, schema):
-        with allure.step(f"Validate object schema: {schema}"):
-            validator = Validator()
-            validator.validate(checking_object, schema)
+        """
+        :param schema: имя схемы из реестра (framework/helpers/schemas.py) или схема cerberus
+        """
+        from hamcrest import assert_that, equal_to
+        with step("Validate object schema: {}", schema):
+            validator = SchemaRegistry.validator(schema)
+            started = time.perf_counter()
+            valid = validator.validate(checking_object)
+            metrics = get_registry()
+            if metrics is not None:
+                metrics.record_schema_validation(schema, time.perf_counter() - started)
+            assert_that(valid, equal_to(True), f"Object doesn't match schema: {validator.errors}")
 
     @staticmethod
-    def request_exec_time(curr_time, expected_time):
-        with allure.step(f"Check request execution time ({curr_time} <= {expected_time})"):
-            assert_that(curr_time, less_than_or_equal_to(expected_time), "Too long request execution")
+    def record_schema(record, schema="character_list"):
+        """
+        Проверить один элемент списка (например, запись из потокового ответа) по схеме списка из реестра
+        """
+        from hamcrest import assert_that, equal_to
+        with step("Validate record schema: {}", record):
+            errors = SchemaRegistry.validate_record(record, schema)
+            assert_that(errors, equal_to({}), f"Record doesn't match schema '{schema}': {errors}")
+
+    @staticmethod
+    def request_exec_time(curr_time, expected_time, timing=None):
+        """
+        :param timing: разбивка времени запроса по этапам (RequestTiming),
+                       при превышении времени прикладывается к отчету
+        """
+        from hamcrest import assert_that, less_than_or_equal_to
+        with step("Check request execution time ({} <= {})", curr_time, expected_time):
+            if timing is not None and curr_time > expected_time:
+                allure.attach(json.dumps(timing.to_dict(), indent=1), name="Request timing",
+                              attachment_type=allure.attachment_type.JSON)
+            assert_that(curr_time, less_than_or_equal_to(expected_time),
+                        "Too long request execution" + (f" ({timing})" if timing is not None else ""))
 
     @staticmethod
     def obj_type(obj, expected_type: type, negative: bool = False):
-        with allure.step(f"Check object type (expect {expected_type})"):
+        from hamcrest import assert_that, is_not, is_
+        with step("Check object type (expect {})", expected_type):
             assert_that(obj, is_not(expected_type), f"Wrong type ({type(obj)} but expect not {expected_type})") \
                 if negative else \
                 assert_that(obj, is_(expected_type), f"Wrong type ({type(obj)} but expect {expected_type})")
 
     @staticmethod
     def matching_data(curr_data, expected_data):
-        with allure.step(f"Check that data matched"):
+        from hamcrest import assert_that, equal_to
+        with step("Check that data matched"):
             assert_that(curr_data, equal_to(expected_data), "Data aren't equal")
 
+    @staticmethod
+    def matching_snapshot(curr_snapshot, expected_snapshot):
+        from hamcrest import assert_that, equal_to
+        with step("Check that collection snapshots matched"):
+            diff = curr_snapshot.diff(expected_snapshot)
+            assert_that(bool(diff), equal_to(False), f"Collections aren't equal:\n{diff}")
+
+    @staticmethod
+    def linearizable(race_result):
+        """
+        Проверить, что результат конкурентных запросов (framework/race.py) совпадает с последовательным выполнением
+        """
+        from hamcrest import assert_that, equal_to
+        with step("Check that concurrent requests are linearizable"):
+            assert_that(race_result.is_linearizable, equal_to(True), f"Race condition detected:\n{race_result}")
+
+    @staticmethod
+    def no_errors(responses: list):
+        """
+        Проверить, что список неуспешных ответов (например, SeedSummary.errors) пуст
+        """
+        from hamcrest import assert_that, equal_to
+        with step("Check that there are no failed responses"):
+            failed = "\n".join(f"{response.status_code}: {response.text}" for response in responses)
+            assert_that(responses, equal_to([]), f"Failed responses ({len(responses)}):\n{failed}")
+
     @staticmethod
     def data_contain_str(data, substring):
-        with allure.step(f"Check that data '{data}' contain '{substring}'"):
+        from hamcrest import assert_that, contains_string
+        with step("Check that data '{}' contain '{}'", data, substring):
             assert_that(data, contains_string(substring), "Data don't contain substring")
 
     @staticmethod
     def base_complex_check(response, status_code, exec_time=1.5, schema=None):
-        with allure.step(f"Base check response: status code = {status_code}, execution time = {exec_time}, "
-                         f"schema = {schema}"):
+        with step("Base check response: status code = {}, execution time = {}, schema = {}",
+                  status_code, exec_time, schema):
             Checker.status_code(response.status_code, status_code)
-            Checker.request_exec_time(response.time, exec_time)
+            Checker.request_exec_time(response.time, exec_time, getattr(response, "timing", None))
             if schema:
                 Checker.object_schema(response.content, schema)
             Checker.headers(response.headers, {"Connection": "keep-alive"})
@@ -0,0 +1,115 @@
+from framework.helpers.reporting import step
+
+"""
+Индексированное представление коллекции персонажей (ответа GET /characters)
+"""
+
+
+class CharacterCollection:
+    """
+    Класс для работы с коллекцией персонажей: индекс по имени, число дубликатов, поиск по любому полю
+    и обновление после запросов POST/PUT/DELETE без повторного запроса всей коллекции.
+    Индексы по остальным полям строятся при первом поиске по полю и дальше обновляются вместе с коллекцией
+    """
+
+    def __init__(self, records=()):
+        self._records = {}
+        self._by_name = {}
+        self._field_indexes = {}
+        self._next_key = 0
+        for record in records:
+            self._add(dict(record))
+
+    @classmethod
+    def from_response(cls, response) -> "CharacterCollection":
+        with step("Build indexed collection from response"):
+            return cls(response.content.get("result"))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def records(self) -> list:
+        return list(self._records.values())
+
+    def get(self, name) -> list:
+        """
+        Все записи с именем name (в порядке коллекции)
+        """
+        return [self._records[key] for key in self._by_name.get(name, ())]
+
+    def count(self, name) -> int:
+        return len(self._by_name.get(name, ()))
+
+    def duplicates(self) -> dict:
+        """
+        {имя: число записей} для имен, которые встречаются больше одного раза
+        """
+        return {name: len(keys) for name, keys in self._by_name.items() if len(keys) > 1}
+
+    def first_duplicate(self):
+        """
+        Первое (в порядке коллекции) повторяющееся имя и число записей с ним.
+        Если дубликатов нет - первое имя коллекции и 1
+        """
+        with step("Get first duplicate name in collection"):
+            for name, keys in self._by_name.items():
+                if len(keys) > 1:
+                    return name, len(keys)
+            return next(iter(self._by_name), None), 1
+
+    def find(self, field, value) -> list:
+        """
+        Все записи, у которых значение поля field равно value
+        """
+        index = self._field_indexes.get(field)
+        if index is None:
+            index = self._field_indexes[field] = {}
+            for key, record in self._records.items():
+                index.setdefault(record.get(field), []).append(key)
+        return [self._records[key] for key in index.get(value, ())]
+
+    # Обновление после запросов к API
+    def apply_post(self, character_data: dict):
+        with step("Add record '{}' to indexed collection", character_data.get("name")):
+            self._add(dict(character_data))
+
+    def apply_put(self, character_data: dict):
+        with step("Update records '{}' in indexed collection", character_data.get("name")):
+            update = {field: value for field, value in character_data.items() if field != "name"}
+            for key in self._by_name.get(character_data.get("name"), ()):
+                record = self._records[key]
+                for field, value in update.items():
+                    index = self._field_indexes.get(field)
+                    if index is not None:
+                        self._unindex(index, record.get(field), key)
+                        index.setdefault(value, []).append(key)
+                record.update(update)
+
+    def apply_delete(self, name):
+        with step("Delete records '{}' from indexed collection", name):
+            for key in self._by_name.pop(name, ()):
+                record = self._records.pop(key)
+                for field, index in self._field_indexes.items():
+                    self._unindex(index, record.get(field), key)
+
+    def _add(self, record):
+        key = self._next_key
+        self._next_key += 1
+        self._records[key] = record
+        self._by_name.setdefault(record.get("name"), []).append(key)
+        for field, index in self._field_indexes.items():
+            index.setdefault(record.get(field), []).append(key)
+
+    @staticmethod
+    def _unindex(index, value, key):
+        keys = index.get(value)
+        if keys is not None:
+            keys.remove(key)
+            if not keys:
+                del index[value]
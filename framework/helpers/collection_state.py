@@ -0,0 +1,76 @@
+import threading
+from contextlib import contextmanager
+
+"""
+Отслеживание изменений коллекции сервиса: любой запрос на изменение данных (кроме успешного POST /reset)
+помечает коллекцию измененной. Сброс коллекции перед тестами нужен только если она изменена с момента
+последнего сброса (или ее состояние неизвестно, например в начале прогона)
+"""
+
+RESET_METHOD = "reset"
+
+
+class CollectionState:
+    """
+    Класс состояния коллекции: признак изменения с последнего сброса (dirty), число запросов на изменение данных
+    (writes), число выполненных и пропущенных сбросов. Объект общий для всех объектов API одного сервиса
+    """
+
+    def __init__(self, dirty: bool = True):
+        self.dirty = dirty
+        self.writes = 0
+        self.resets = 0
+        self.skipped_resets = 0
+        self._lock = threading.Lock()
+
+    def record_write(self, api_method, response=None):
+        """
+        :param response: ответ на запрос (None, если запрос завершился исключением)
+        """
+        with self._lock:
+            if api_method == RESET_METHOD and response is not None and response.status_code == 200:
+                self.dirty = False
+                self.resets += 1
+            else:
+                self.dirty = True
+                self.writes += 1
+
+    @contextmanager
+    def baseline(self):
+        """
+        Запросы внутри блока не считаются изменением коллекции (например, копии фиксированных записей воркера,
+        которые добавляются сразу после сброса)
+        """
+        with self._lock:
+            dirty, writes = self.dirty, self.writes
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.dirty, self.writes = dirty, writes
+
+    def skip_reset(self):
+        with self._lock:
+            self.skipped_resets += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"dirty": self.dirty, "writes": self.writes, "resets": self.resets,
+                    "skipped_resets": self.skipped_resets}
+
+    def __repr__(self):
+        return f"CollectionState({self.stats()})"
+
+
+def tracked_request(state: CollectionState, request_type, api_method, execute):
+    """
+    Выполнить запрос с учетом в состоянии коллекции: GET выполняется как есть, остальные методы отмечаются в state
+    """
+    if request_type.upper() == "GET":
+        return execute()
+    response = None
+    try:
+        response = execute()
+        return response
+    finally:
+        state.record_write(api_method, response)
@@ -1,6 +1,7 @@
 import os
+from base64 import b64encode
 
-import allure
+from framework.helpers.reporting import step
 
 
 class Credentials:
@@ -16,15 +17,20 @@ class Credentials:
 
     @property
     def login(self):
-        with allure.step("Get LOGIN"):
+        with step("Get LOGIN"):
             return self.__login
 
     @property
     def password(self):
-        with allure.step("Get PASSWORD"):
+        with step("Get PASSWORD"):
             return self.__password
 
+    def basic_auth_header(self):
+        with step("Build Basic authorization header"):
+            token = b64encode(f"{self.__login}:{self.__password}".encode("latin1")).decode("ascii")
+            return f"Basic {token}"
+
     @staticmethod
     def _get_credentials():
-        with allure.step("Getting LOGIN and PASSWORD for authorization"):
+        with step("Getting LOGIN and PASSWORD for authorization"):
             return os.getenv('TEST_LOGIN'), os.getenv('TEST_PASSWORD')
@@ -0,0 +1,150 @@
+import random
+import threading
+from collections import deque
+from math import gcd
+
+from framework.helpers.workers import worker_id
+
+"""
+Генерация тестовых данных без Faker: уникальные имена и корректные/некорректные записи персонажей.
+Имена берутся из заранее сгенерированных порциями пулов, у каждого воркера xdist свой непересекающийся диапазон
+"""
+
+# Размер диапазона номеров имен одного воркера
+SLOT_SIZE = 10 ** 7
+
+# Некорректные значения полей по видам ошибок. Правила проверки полей сервисом не документированы, поэтому
+# берутся только значения, на которые уже рассчитаны негативные тесты (пустые, null, слишком длинные,
+# со спецсимволами, не того типа), без предположений о точных границах
+INVALID_STR_VALUES = {"empty": "", "null": None, "too_long": "A" * 2 ** 10, "not_str": 123,
+                      "bad_symbols": "!?;:/|@#$%^&*_-+=~<>±§"}
+INVALID_NUMERIC_VALUES = {"empty": "", "null": None, "not_numeric": "A" * 2 ** 10, "with_space": "1 2",
+                          "mixed": "123.1a2b3"}
+STR_FIELDS = ("name", "universe", "education", "identity", "other_aliases")
+NUMERIC_FIELDS = ("weight", "height")
+
+# Записи коллекции после сброса, которые тесты изменяют и удаляют (при общей коллекции у воркера свои копии)
+FIXED_NAMES = ("Nomad", "Mary Jane Watson", "Dracula")
+
+
+def invalid_cases(fields=STR_FIELDS + NUMERIC_FIELDS) -> list:
+    """
+    Случаи некорректных записей для параметризации тестов: [(поле, вид ошибки), ...]
+    """
+    return [(field, kind) for field in fields
+            for kind in (INVALID_NUMERIC_VALUES if field in NUMERIC_FIELDS else INVALID_STR_VALUES)]
+
+
+def fixed_name(name: str, namespace: str = None) -> str:
+    """
+    Имя копии фиксированной записи name в пространстве имен namespace (без namespace - сама запись)
+    """
+    return name if namespace is None else f"{name} {namespace}"
+
+
+class DataFactory:
+    """
+    Класс генерации тестовых данных.
+    Номера имен - псевдослучайная перестановка диапазона воркера (a * i + b) mod SLOT_SIZE, поэтому имена
+    не повторяются без хранения уже выданных, а при одинаковом seed последовательность имен воспроизводится
+    """
+
+    def __init__(self, seed: int = None, slot: int = 0, batch_size: int = 1024, namespace: str = None):
+        """
+        :param seed: зерно генерации (None - случайное)
+        :param slot: номер непересекающегося диапазона имен (номер воркера xdist)
+        :param namespace: пространство имен копий фиксированных записей (имя воркера xdist при общей коллекции)
+        """
+        self.seed = seed
+        self.slot = slot
+        self.namespace = namespace
+        self.batch_size = batch_size
+        self._rng = random.Random(seed if seed is None else f"{seed}:{slot}")
+        self._step = self._rng.randrange(1, SLOT_SIZE)
+        while gcd(self._step, SLOT_SIZE) != 1:
+            self._step += 1
+        self._shift = self._rng.randrange(SLOT_SIZE)
+        self._issued = 0
+        self._reserved = SLOT_SIZE
+        self._numbers = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_worker(cls, seed: int = None, **kwargs) -> "DataFactory":
+        """
+        Фабрика с диапазоном имен текущего воркера xdist ('gw3' -> 3, без xdist - 0)
+        """
+        worker = worker_id()
+        return cls(seed, slot=int(worker[2:]) if worker.startswith("gw") else 0, **kwargs)
+
+    def _at(self, position) -> int:
+        return self.slot * SLOT_SIZE + (self._step * position + self._shift) % SLOT_SIZE
+
+    def _fill(self):
+        if self._issued + self.batch_size > self._reserved:
+            raise OverflowError(f"Names range of slot {self.slot} is exhausted ({SLOT_SIZE} names)")
+        self._numbers.extend(self._at(position) for position in range(self._issued, self._issued + self.batch_size))
+        self._issued += self.batch_size
+
+    def number(self) -> int:
+        with self._lock:
+            if not self._numbers:
+                self._fill()
+            return self._numbers.popleft()
+
+    def fixed_name(self, name: str) -> str:
+        """
+        Имя фиксированной записи коллекции (FIXED_NAMES) или ее копии этого воркера
+        """
+        return fixed_name(name, self.namespace)
+
+    def name(self, prefix: str = "TestName") -> str:
+        return f"{prefix}{self.number()}"
+
+    def names(self, n: int, prefix: str = "TestName") -> list:
+        return [self.name(prefix) for _ in range(n)]
+
+    def character(self, name: str = None, prefix: str = "TestName", **fields) -> dict:
+        """
+        Корректная запись персонажа с уникальным именем; fields заменяют значения по умолчанию
+        """
+        character_data = {"name": name or self.name(prefix),
+                          "universe": "TestUniverse",
+                          "education": "TestEducation",
+                          "weight": 1,
+                          "height": 2,
+                          "identity": "TestIdentity",
+                          "other_aliases": "TestAliases"}
+        character_data.update(fields)
+        return character_data
+
+    def characters(self, n: int, prefix: str = "TestName") -> list:
+        return [self.character(prefix=prefix) for _ in range(n)]
+
+    def invalid_character(self, field: str, kind: str, prefix: str = "TestName") -> dict:
+        """
+        Запись с некорректным значением поля field вида kind (см. invalid_cases)
+        """
+        values = INVALID_NUMERIC_VALUES if field in NUMERIC_FIELDS else INVALID_STR_VALUES
+        # Значение задается после создания записи: пустое имя заменилось бы сгенерированным
+        character_data = self.character(prefix=prefix)
+        character_data[field] = values[kind]
+        return character_data
+
+    def factory(self, prefix: str = "Seed", size: int = 10 ** 4):
+        """
+        Фабрика корректных уникальных записей для seed_characters: factory(index) -> dict, index < size.
+        Под фабрику резервируется свой блок номеров (с конца диапазона), поэтому имя зависит только от index,
+        а не от того, сколько записей успели запросить параллельные потоки
+        """
+        with self._lock:
+            if self._reserved - size < self._issued:
+                raise OverflowError(f"Names range of slot {self.slot} is exhausted ({SLOT_SIZE} names)")
+            self._reserved -= size
+            start = self._reserved
+
+        def factory(index):
+            if not 0 <= index < size:
+                raise IndexError(f"Factory '{prefix}' has {size} names, index {index} is out of range")
+            return self.character(name=f"{prefix}_TestName_{self._at(start + index)}")
+        return factory
@@ -0,0 +1,99 @@
+import os
+
+import allure
+
+"""
+Шаги отчета Allure для методов фреймворка. Заголовок шага передается шаблоном с аргументами
+и формируется только тогда, когда шаг действительно попадает в отчет. Длинные аргументы обрезаются.
+Режимы (опция '--report-mode' или переменная окружения TEST_REPORT_MODE):
+ - detailed - каждый шаг попадает в отчет (по умолчанию)
+ - lean - шаги в отчет не попадают, заголовок формируется только для упавшего шага
+"""
+
+DETAILED = "detailed"
+LEAN = "lean"
+MODES = (DETAILED, LEAN)
+
+MAX_ARG_LENGTH = 256
+
+_mode = os.getenv("TEST_REPORT_MODE", DETAILED)
+
+
+def set_mode(mode):
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"Unknown report mode '{mode}'. Available modes: {MODES}")
+    _mode = mode
+
+
+def get_mode():
+    return _mode
+
+
+def short(obj, limit=MAX_ARG_LENGTH):
+    """
+    Строковое представление объекта для заголовка шага. Строки обрезаются до преобразования контейнера в строку,
+    поэтому огромные значения (например, имя длиной 64 KiB) не форматируются целиком
+    """
+    if isinstance(obj, str):
+        return obj if len(obj) <= limit else f"{obj[:limit]}...(+{len(obj) - limit} chars)"
+    if isinstance(obj, dict):
+        text = str({key: _Short(value, limit) for key, value in obj.items()})
+    elif isinstance(obj, (list, tuple)):
+        text = str(type(obj)(_Short(value, limit) for value in obj))
+    else:
+        text = str(obj)
+    return text if len(text) <= limit else f"{text[:limit]}...(+{len(text) - limit} chars)"
+
+
+class _Short:
+    """
+    Обертка для вложенных значений: внутри контейнера значение выводится уже обрезанным
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit):
+        self.value = value
+        self.limit = limit
+
+    def __repr__(self):
+        if isinstance(self.value, str):
+            return repr(short(self.value, self.limit))
+        return short(self.value, self.limit)
+
+
+class step:
+    """
+    Шаг отчета с ленивым заголовком: step("Check status code (expect [{}])", expected_status_code)
+    """
+
+    __slots__ = ("title", "args", "_step")
+
+    def __init__(self, title, *args):
+        self.title = title
+        self.args = args
+        self._step = None
+
+    def render(self):
+        return self.title.format(*(short(arg) for arg in self.args)) if self.args else self.title
+
+    def __enter__(self):
+        if _mode == DETAILED:
+            self._step = allure.step(self.render())
+            self._step.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._step is not None:
+            return self._step.__exit__(exc_type, exc_val, exc_tb)
+        if exc_type is not None and not getattr(exc_val, "_step_reported", False):
+            # В режиме lean в отчет попадает только самый вложенный упавший шаг
+            failed_step = allure.step(self.render())
+            failed_step.__enter__()
+            failed_step.__exit__(exc_type, exc_val, exc_tb)
+            try:
+                exc_val._step_reported = True
+            except AttributeError:
+                pass
+        return False
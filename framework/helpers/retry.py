@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from requests import ConnectionError, Timeout
+
+from framework.helpers.reporting import step
+from framework.helpers.timing import current_timing
+from framework.metrics import get_registry
+
+"""
+Повтор отдельного запроса при временных ошибках (вместо перезапуска всего теста)
+"""
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+@dataclass
+class RetryRecord:
+    """
+    Структура с описанием одного повтора запроса
+    """
+    method: str
+    api_method: str
+    attempt: int
+    reason: str
+    delay: float
+
+    def to_dict(self) -> dict:
+        return {"method": self.method, "api_method": self.api_method, "attempt": self.attempt,
+                "reason": self.reason, "delay": self.delay}
+
+
+class RetryPolicy:
+    """
+    Класс политики повторов: число попыток, экспоненциальная задержка между попытками со случайной составляющей,
+    коды ответов и исключения, при которых запрос повторяется.
+    POST не идемпотентен (повтор может добавить запись дважды), поэтому повторяется только при retry_post=True.
+    Все повторы записываются в history
+    """
+
+    def __init__(self, attempts: int = 3, backoff: float = 0.2, max_backoff: float = 5.0, jitter: float = 0.5,
+                 statuses=(429, 502, 503, 504), exceptions=(ConnectionError, Timeout), retry_post: bool = False,
+                 seed: int = None):
+        """
+        :param attempts: общее число попыток (1 - без повторов)
+        :param backoff: задержка перед первым повтором, дальше удваивается (не больше max_backoff)
+        :param jitter: доля задержки, которая выбирается случайно (0 - без случайной составляющей)
+        """
+        if attempts < 1:
+            raise ValueError(f"Number of attempts must be positive, got {attempts}")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.retry_post = retry_post
+        self.history = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def allows(self, method: str) -> bool:
+        method = method.upper()
+        return method in IDEMPOTENT_METHODS or (method == "POST" and self.retry_post)
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Задержка перед повтором после неудачной попытки номер attempt (с 1)
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        with self._lock:
+            delay *= 1 - self.jitter + self.jitter * self._rng.random()
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+    def record(self, retry: RetryRecord):
+        with self._lock:
+            self.history.append(retry)
+
+    def stats(self) -> dict:
+        """
+        Число повторов по причинам
+        """
+        with self._lock:
+            reasons = {}
+            for retry in self.history:
+                reasons[retry.reason] = reasons.get(retry.reason, 0) + 1
+            return {"retries": len(self.history), "reasons": reasons}
+
+    def __repr__(self):
+        return f"RetryPolicy(attempts={self.attempts}, backoff={self.backoff}, {self.stats()})"
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def call_with_retry(policy: RetryPolicy, method: str, api_method: str, call):
+    """
+    Выполнить запрос call() с повторами по политике policy. Возвращается последний полученный ответ,
+    если все попытки закончились исключением - оно пробрасывается.
+    Если запрос замеряется (RequestTiming), каждая попытка замеряется отдельно, ожидание пишется в retry_wait
+    """
+    if policy is None or policy.attempts == 1 or not policy.allows(method):
+        return call()
+    for attempt in range(1, policy.attempts + 1):
+        last = attempt == policy.attempts
+        timing = current_timing()
+        if timing is not None and attempt > 1:
+            timing.start_attempt()
+        try:
+            response = call()
+        except policy.exceptions as error:
+            if last:
+                raise
+            reason, retry_after = type(error).__name__, None
+        else:
+            if last or response.status_code not in policy.statuses:
+                return response
+            reason, retry_after = str(response.status_code), _retry_after(response)
+            response.close()
+        delay = policy.delay(attempt, retry_after)
+        policy.record(RetryRecord(method.upper(), api_method, attempt, reason, delay))
+        metrics = get_registry()
+        if metrics is not None:
+            metrics.record_retry(method, api_method, reason)
+        with step("Retry {} {} after '{}' (attempt {} of {}), wait {} s",
+                  method.upper(), api_method.upper(), reason, attempt + 1, policy.attempts, round(delay, 3)):
+            started = time.perf_counter()
+            time.sleep(delay)
+            if timing is not None:
+                timing.retry_wait += time.perf_counter() - started
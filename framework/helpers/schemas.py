@@ -0,0 +1,184 @@
+import json
+import threading
+from collections.abc import Mapping, Sequence
+
+from framework.helpers.reporting import step
+
+"""
+Реестр схем ответов API. Валидаторы для схем создаются один раз и переиспользуются.
+Для схем вида "список плоских словарей" (например, ответ GET /characters) используется быстрая проверка
+без создания дочерних валидаторов cerberus на каждый элемент списка
+"""
+
+CHARACTER = {
+    "education": {"type": "string"},
+    "height": {"type": "number"},
+    "weight": {"type": "number"},
+    "identity": {"type": "string"},
+    "name": {"type": "string"},
+    "other_aliases": {"type": "string"},
+    "universe": {"type": "string"}
+}
+
+SCHEMAS = {
+    "character": {"result": {"type": "dict", "schema": CHARACTER}},
+    "character_list": {"result": {"type": "list", "schema": {"type": "dict", "schema": CHARACTER}}},
+    "result": {"result": {"type": "string"}},
+    "error": {"error": {"type": "string"}},
+    # В тестах раньше была схема с regex "name": результат проверки не проверялся, а cerberus сравнивает regex
+    # со всей строкой, поэтому ни одно реальное сообщение ей не соответствует. ".*name.*" - сообщение упоминает name
+    "name_error": {"error": {"type": "string", "regex": ".*name.*"}},
+}
+
+# Типы cerberus, которые умеет проверять быстрый валидатор (bool не считается числом, как и в cerberus)
+_FAST_TYPES = {
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "float": lambda value: isinstance(value, float),
+    "boolean": lambda value: isinstance(value, bool),
+}
+
+
+class _RecordListValidator:
+    """
+    Быстрый валидатор для схемы {<ключ>: {"type": "list", "schema": {"type": "dict", "schema": <плоская схема>}}}.
+    Повторяет правила cerberus для такой схемы: неизвестные поля запрещены, необязательные поля могут отсутствовать
+    """
+
+    max_errors = 10
+
+    def __init__(self, key, record_schema):
+        self.key = key
+        self.fields = {field: (rules["type"], _FAST_TYPES[rules["type"]]) for field, rules in record_schema.items()}
+        self.required = [field for field, rules in record_schema.items() if rules.get("required")]
+        self.errors = {}
+
+    @staticmethod
+    def supports(schema) -> bool:
+        if len(schema) != 1:
+            return False
+        rules = next(iter(schema.values()))
+        items = rules.get("schema", {})
+        return (set(rules) == {"type", "schema"} and rules["type"] == "list"
+                and set(items) == {"type", "schema"} and items["type"] == "dict"
+                and all(set(field_rules) <= {"type", "required"} and field_rules["type"] in _FAST_TYPES
+                        for field_rules in items["schema"].values()))
+
+    def validate(self, document) -> bool:
+        self.errors = {}
+        if not isinstance(document, Mapping):
+            self.errors = {"document": ["must be of dict type"]}
+            return False
+        unknown = [key for key in document if key != self.key]
+        if unknown:
+            self.errors.update({key: ["unknown field"] for key in unknown})
+        records = document.get(self.key)
+        if self.key not in document:
+            return not self.errors
+        if not isinstance(records, Sequence) or isinstance(records, str):
+            self.errors[self.key] = ["must be of list type"]
+            return False
+        record_errors = {}
+        for index, record in enumerate(records):
+            errors = self.validate_record(record)
+            if errors:
+                record_errors[index] = errors
+                if len(record_errors) >= self.max_errors:
+                    break
+        if record_errors:
+            self.errors[self.key] = [record_errors]
+        return not self.errors
+
+    def validate_record(self, record):
+        """
+        Проверить один элемент списка. Возвращает ошибки (пустой словарь, если ошибок нет)
+        """
+        if not isinstance(record, Mapping):
+            return ["must be of dict type"]
+        fields = self.fields
+        errors = {}
+        for field, value in record.items():
+            rule = fields.get(field)
+            if rule is None:
+                errors[field] = ["unknown field"]
+            elif not rule[1](value):
+                errors[field] = [f"must be of {rule[0]} type"]
+        for field in self.required:
+            if field not in record:
+                errors[field] = ["required field"]
+        return errors
+
+
+class SchemaRegistry:
+    """
+    Класс для получения (скомпилированных и закешированных) валидаторов по имени схемы или по самой схеме
+    """
+
+    _local = threading.local()
+    # Поколение реестра: увеличивается при регистрации схемы, кеши валидаторов всех потоков с другим поколением
+    # считаются устаревшими
+    _generation = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_schema(schema):
+        if isinstance(schema, str):
+            if schema not in SCHEMAS:
+                raise KeyError(f"Unknown schema '{schema}'. Registered schemas: {list(SCHEMAS)}")
+            return SCHEMAS[schema]
+        return schema
+
+    @classmethod
+    def register(cls, name, schema):
+        with step("Register schema '{}'", name):
+            with cls._lock:
+                SCHEMAS[name] = schema
+                cls._generation += 1
+
+    @classmethod
+    def validator(cls, schema):
+        """
+        Валидатор для схемы. Валидаторы хранят результат последней проверки,
+        поэтому кеш у каждого потока свой
+        """
+        key = schema if isinstance(schema, str) else json.dumps(schema, sort_keys=True, default=str)
+        validators = cls._validators()
+        validator = validators.get(key)
+        if validator is None:
+            validator = validators[key] = cls._compile(cls.get_schema(schema))
+        return validator
+
+    @classmethod
+    def validate_record(cls, record, schema="character_list") -> dict:
+        """
+        Проверить один элемент списка по схеме списка {<ключ>: {"type": "list", "schema": <схема элемента>}}.
+        Возвращает ошибки (пустой словарь, если ошибок нет)
+        """
+        validator = cls.validator(schema)
+        if isinstance(validator, _RecordListValidator):
+            return validator.validate_record(record)
+        list_schema = cls.get_schema(schema)
+        rules = next(iter(list_schema.values())) if len(list_schema) == 1 else None
+        if not isinstance(rules, Mapping) or rules.get("type") != "list" or "schema" not in rules:
+            raise ValueError(f"Schema '{schema}' is not a schema of a list, records can't be validated by it")
+        record_validator = cls.validator({"record": rules["schema"]})
+        if record_validator.validate({"record": record}):
+            return {}
+        return record_validator.errors
+
+    @classmethod
+    def _validators(cls) -> dict:
+        if getattr(cls._local, "generation", None) != cls._generation:
+            cls._local.validators = {}
+            cls._local.generation = cls._generation
+        return cls._local.validators
+
+    @staticmethod
+    def _compile(schema):
+        if _RecordListValidator.supports(schema):
+            key, rules = next(iter(schema.items()))
+            return _RecordListValidator(key, rules["schema"]["schema"])
+        # cerberus загружается только при первой схеме, которую не проверяет быстрый валидатор
+        from cerberus import Validator
+        return Validator(schema)
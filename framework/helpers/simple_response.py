@@ -1,13 +1,70 @@
-from dataclasses import dataclass
+import json
+import time
 from typing import Any
 
+# Сатус коды, для которых тело ответа не преобразуется из json (могут быть дополненены)
+RAW_CONTENT_STATUSES = (414, )
+
 
-@dataclass
 class SimpleResponse:
     """
-    Структура для упрощения работы с ответами на запросы
+    Структура для упрощения работы с ответами на запросы.
+    Хранит тело ответа в исходном виде (байты) и преобразует его из json только при первом обращении к content,
+    заголовки не копируются (регистронезависимый словарь из ответа requests)
     """
-    status_code: int
-    time: float
-    headers: dict
-    content: Any
+    __slots__ = ("status_code", "time", "headers", "raw", "encoding", "timing", "_content", "_decoded")
+
+    def __init__(self, status_code: int, time: float, headers, content: Any = None, raw: bytes = b"",
+                 encoding: str = "utf-8", timing=None):
+        """
+        :param content: уже готовое содержимое ответа; если не передано, вычисляется из raw при первом обращении
+        :param timing: разбивка времени запроса по этапам (RequestTiming), в нее же пишется время разбора json
+        """
+        self.status_code = status_code
+        self.time = time
+        self.headers = headers
+        self.raw = raw
+        self.encoding = encoding
+        self.timing = timing
+        self._content = content
+        self._decoded = content is not None
+
+    @classmethod
+    def from_response(cls, response, timing=None) -> "SimpleResponse":
+        return cls(status_code=response.status_code,
+                   time=response.elapsed.total_seconds(),
+                   headers=response.headers,
+                   raw=response.content,
+                   encoding=response.encoding or "utf-8",
+                   timing=timing)
+
+    @property
+    def text(self) -> str:
+        return self.raw.decode(self.encoding, errors="replace")
+
+    @property
+    def content(self) -> Any:
+        if not self._decoded:
+            started = time.perf_counter()
+            text = self.text
+            self._content = json.loads(text) if text and self.status_code not in RAW_CONTENT_STATUSES else text
+            self._decoded = True
+            if self.timing is not None:
+                self.timing.decode = time.perf_counter() - started
+        return self._content
+
+    @content.setter
+    def content(self, value: Any):
+        self._content = value
+        self._decoded = True
+
+    def __eq__(self, other):
+        if not isinstance(other, SimpleResponse):
+            return NotImplemented
+        return ((self.status_code, self.time, dict(self.headers), self.content)
+                == (other.status_code, other.time, dict(other.headers), other.content))
+
+    def __repr__(self):
+        content = self._content if self._decoded else f"<{len(self.raw)} bytes, not decoded>"
+        return (f"SimpleResponse(status_code={self.status_code}, time={self.time}, headers={dict(self.headers)}, "
+                f"content={content})")
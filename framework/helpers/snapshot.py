@@ -0,0 +1,119 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from framework.helpers.reporting import step
+
+"""
+Снимки коллекции персонажей: каждая запись описывается хешем содержимого и индексируется по имени,
+поэтому два снимка сравниваются за линейное время, а результат сравнения - компактный список отличий
+"""
+
+
+def record_hash(record: dict) -> str:
+    return hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class SnapshotDiff:
+    """
+    Структура с отличиями двух снимков: добавленные, удаленные и измененные (по именам) записи
+    """
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changed: dict = field(default_factory=dict)
+    reordered: bool = False
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.reordered)
+
+    def __str__(self):
+        if not self:
+            return "No differences"
+        lines = []
+        if self.added:
+            lines.append(f"added ({len(self.added)}): {self.added}")
+        if self.removed:
+            lines.append(f"removed ({len(self.removed)}): {self.removed}")
+        for name, changes in self.changed.items():
+            lines.append(f"changed '{name}': {changes}")
+        if self.reordered:
+            lines.append("records order changed")
+        return "\n".join(lines)
+
+
+class CollectionSnapshot:
+    """
+    Снимок коллекции: {имя: отсортированный список хешей записей с этим именем} + хеш порядка записей.
+    Сами записи хранятся для отчета о том, какие поля изменились
+    """
+
+    def __init__(self, fingerprints: dict, order: str, records: dict = None):
+        self.fingerprints = fingerprints
+        self.order = order
+        self.records = records or {}
+
+    @classmethod
+    def from_records(cls, collection: list) -> "CollectionSnapshot":
+        with step("Make snapshot of collection ({} records)", len(collection)):
+            fingerprints = {}
+            records = {}
+            order = hashlib.sha1()
+            for record in collection:
+                digest = record_hash(record)
+                name = record.get("name")
+                fingerprints.setdefault(name, []).append(digest)
+                records.setdefault(name, []).append(record)
+                order.update(digest.encode("ascii"))
+            for digests in fingerprints.values():
+                digests.sort()
+            return cls(fingerprints, order.hexdigest()[:16], records)
+
+    @classmethod
+    def from_response(cls, response) -> "CollectionSnapshot":
+        return cls.from_records(response.content.get("result"))
+
+    def __eq__(self, other):
+        return (isinstance(other, CollectionSnapshot) and self.order == other.order
+                and self.fingerprints == other.fingerprints)
+
+    def __len__(self):
+        return sum(len(digests) for digests in self.fingerprints.values())
+
+    def diff(self, expected: "CollectionSnapshot") -> SnapshotDiff:
+        """
+        Отличия текущего снимка от ожидаемого
+        """
+        with step("Compare collection snapshots"):
+            result = SnapshotDiff()
+            for name, digests in self.fingerprints.items():
+                expected_digests = expected.fingerprints.get(name)
+                if expected_digests is None:
+                    result.added.append(name)
+                elif digests != expected_digests:
+                    result.changed[name] = self._changes(name, expected)
+            result.removed = [name for name in expected.fingerprints if name not in self.fingerprints]
+            result.reordered = not result and self.order != expected.order
+            return result
+
+    def _changes(self, name, expected: "CollectionSnapshot"):
+        current_records = self.records.get(name, [])
+        expected_records = expected.records.get(name, [])
+        if len(current_records) == 1 and len(expected_records) == 1:
+            current, previous = current_records[0], expected_records[0]
+            return {key: (previous.get(key), current.get(key)) for key in sorted(set(current) | set(previous))
+                    if previous.get(key) != current.get(key)}
+        return f"{len(expected.fingerprints[name])} record(s) -> {len(self.fingerprints[name])} record(s)"
+
+    def save(self, path):
+        with step("Save collection snapshot to '{}'", path):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"order": self.order, "fingerprints": self.fingerprints, "records": self.records}, file,
+                          ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path) -> "CollectionSnapshot":
+        with step("Load collection snapshot from '{}'", path):
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            return cls(data["fingerprints"], data["order"], data.get("records"))
@@ -0,0 +1,142 @@
+import builtins
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+"""
+Отчет о времени запуска pytest: сколько заняли запуск интерпретатора и pytest, загрузка плагинов и conftest,
+сбор тестов (по модулям) и первый импорт каждого пакета (собственное время пакета без вложенных импортов
+других пакетов). Плагин нужно загрузить раньше conftest, иначе импорты conftest не попадут в отчет:
+    pytest -p framework.helpers.startup --collect-only -q tests
+"""
+
+TOP = 15
+
+
+def process_uptime():
+    """
+    Время с запуска процесса (секунды). На Linux - по /proc, на остальных системах - None
+    """
+    try:
+        with open("/proc/self/stat") as file:
+            # Имя процесса в скобках может содержать пробелы, поля считаются после него
+            started = int(file.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as file:
+            uptime = float(file.read().split()[0])
+        return uptime - started / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ImportProfiler:
+    """
+    Класс замера первых импортов через builtins.__import__ (только в основном потоке):
+    {пакет верхнего уровня: собственное время импорта}. Импорты через importlib.import_module
+    (например, модулей с тестами) не замеряются, но замеряются импорты внутри этих модулей
+    """
+
+    def __init__(self):
+        self.times = {}
+        self._stack = []
+        self._original = None
+        self._thread = None
+
+    def start(self) -> "ImportProfiler":
+        self._original = builtins.__import__
+        self._thread = threading.get_ident()
+        builtins.__import__ = self._import
+        return self
+
+    def stop(self):
+        if self._original is not None and builtins.__import__ is self._import:
+            builtins.__import__ = self._original
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or threading.get_ident() != self._thread:
+            return self._original(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            package = name.partition(".")[0]
+            self.times[package] = self.times.get(package, 0.0) + elapsed - nested
+
+    def slowest(self, count: int = TOP) -> list:
+        return sorted(self.times.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+class StartupReport:
+    """
+    Класс плагина: отметки времени этапов запуска и сбора тестов, время сбора каждого модуля с тестами
+    """
+
+    def __init__(self):
+        uptime = process_uptime()
+        self.loaded = time.perf_counter()
+        self.process_started = None if uptime is None else self.loaded - uptime
+        self.configured = self.collection_started = self.collection_finished = None
+        self.modules = {}
+        self.imports = ImportProfiler().start()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_configure(self, config):
+        self.configured = time.perf_counter()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_collection(self, session):
+        self.collection_started = time.perf_counter()
+        yield
+        self.collection_finished = time.perf_counter()
+        self.imports.stop()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_make_collect_report(self, collector):
+        if not isinstance(collector, pytest.Module):
+            yield
+            return
+        started = time.perf_counter()
+        yield
+        self.modules[collector.nodeid] = time.perf_counter() - started
+
+    def pytest_unconfigure(self, config):
+        self.imports.stop()
+
+    def phases(self) -> list:
+        marks = [("interpreter and pytest", self.process_started, self.loaded),
+                 ("plugins and conftest", self.loaded, self.configured),
+                 ("configure", self.configured, self.collection_started),
+                 ("collection", self.collection_started, self.collection_finished)]
+        return [(name, finish - start) for name, start, finish in marks if start is not None and finish is not None]
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.collection_finished is None:
+            return
+        write = terminalreporter.write_line
+        terminalreporter.write_sep("-", "startup report")
+        total = self.collection_finished - (self.process_started or self.loaded)
+        write(f"Process start to collected tests: {total:.3f}s")
+        for name, elapsed in self.phases():
+            write(f"  {name:<24}{elapsed * 1000:9.1f}ms")
+        write("Slowest first imports (own time of the package):")
+        for package, elapsed in self.imports.slowest():
+            write(f"  {package:<24}{elapsed * 1000:9.1f}ms")
+        write("Slowest test modules to collect:")
+        for nodeid, elapsed in sorted(self.modules.items(), key=lambda item: item[1], reverse=True)[:TOP]:
+            write(f"  {elapsed * 1000:9.1f}ms  {nodeid}")
+
+
+def pytest_configure(config):
+    if not config.pluginmanager.has_plugin("startup_report"):
+        config.pluginmanager.register(_report, "startup_report")
+
+
+# Замеры начинаются при загрузке модуля плагина (опция '-p' загружает его до остальных плагинов и conftest)
+_report = StartupReport()
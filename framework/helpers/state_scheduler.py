@@ -0,0 +1,125 @@
+import pytest
+
+from framework.helpers.collection_state import CollectionState
+from framework.helpers.workers import is_worker
+
+"""
+Плагин pytest для сокращения числа сбросов коллекции. Каждый тест относится к одному из видов:
+'readonly' (только читает коллекцию) или 'mutating' (изменяет ее). Вид задается метками
+@pytest.mark.readonly / @pytest.mark.mutating, иначе берется из прошлых прогонов: после каждого теста
+записывается, выполнял ли он запросы на изменение данных (хранится в кеше pytest, .pytest_cache).
+Тесты без метки и истории считаются изменяющими.
+Классы, все тесты которых только читают коллекцию, выполняются первыми подряд, поэтому им хватает одного сброса.
+Порядок тестов внутри класса не меняется
+"""
+
+READONLY = "readonly"
+MUTATING = "mutating"
+KINDS = (READONLY, MUTATING)
+CACHE_KEY = "collection_state/kinds"
+PROPERTY = "collection_access"
+
+
+def marked_kind(item):
+    """
+    Вид теста по ближайшей метке (метка метода важнее метки класса) или None
+    """
+    for marker in item.iter_markers():
+        if marker.name in KINDS:
+            return marker.name
+    return None
+
+
+def scope_of(item):
+    # Сброс коллекции выполняется для каждого класса тестов, поэтому переставляются классы целиком
+    return item.getparent(pytest.Class) or item.getparent(pytest.Module)
+
+
+def order_items(items: list, kinds: dict) -> list:
+    """
+    Переставить классы тестов: сначала классы только с читающими тестами, затем остальные (порядок внутри групп
+    сохраняется). kinds - {nodeid теста: вид}
+    """
+    scopes = {}
+    for item in items:
+        scopes.setdefault(scope_of(item), []).append(item)
+    readonly, mutating = [], []
+    for scope_items in scopes.values():
+        group = readonly if all(kinds.get(item.nodeid) == READONLY for item in scope_items) else mutating
+        group.extend(scope_items)
+    return readonly + mutating
+
+
+class StateScheduler:
+    """
+    Класс плагина: состояние коллекции сессии, порядок тестов и запись видов тестов по итогам прогона
+    """
+
+    def __init__(self, config, reorder: bool = True):
+        """
+        :param reorder: переставлять классы тестов (без перестановки отслеживаются только изменения коллекции)
+        """
+        self.config = config
+        self.reorder = reorder
+        self.state = CollectionState()
+        self.observed = {}
+        self.mismatched = []
+        self._mutated = None
+
+    def known_kinds(self) -> dict:
+        cache = getattr(self.config, "cache", None)
+        return cache.get(CACHE_KEY, {}) if cache is not None else {}
+
+    def pytest_configure(self, config):
+        config.addinivalue_line("markers", "readonly: test only reads the collection (runs before mutating tests)")
+        config.addinivalue_line("markers", "mutating: test changes the collection (reset is needed after it)")
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        if not self.reorder:
+            return
+        known = self.known_kinds()
+        kinds = {item.nodeid: marked_kind(item) or known.get(item.nodeid, MUTATING) for item in items}
+        items[:] = order_items(items, kinds)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        self._mutated = None
+        yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        # Запросы фикстур (сброс коллекции и копии фиксированных записей воркера) не относятся к тесту
+        writes_before = self.state.writes
+        yield
+        self._mutated = self.state.writes > writes_before
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        yield
+        # Вид записывается только для выполненных тестов (пропущенный тест ничего не говорит о своих запросах)
+        if self._mutated is not None:
+            item.user_properties.append((PROPERTY, MUTATING if self._mutated else READONLY))
+
+    def pytest_runtest_logreport(self, report):
+        # Под pytest-xdist отчеты воркеров приходят в основной процесс вместе с user_properties
+        for name, kind in report.user_properties:
+            if name != PROPERTY or report.nodeid in self.observed:
+                continue
+            self.observed[report.nodeid] = kind
+            if kind == MUTATING and READONLY in report.keywords and MUTATING not in report.keywords:
+                self.mismatched.append(report.nodeid)
+
+    def pytest_sessionfinish(self, session):
+        cache = getattr(self.config, "cache", None)
+        if cache is None or is_worker() or not self.observed:
+            return
+        cache.set(CACHE_KEY, {**self.known_kinds(), **self.observed})
+
+    def pytest_terminal_summary(self, terminalreporter):
+        stats = self.state.stats()
+        if stats["resets"] or stats["skipped_resets"]:
+            terminalreporter.write_line(f"Collection resets: {stats['resets']} done, "
+                                        f"{stats['skipped_resets']} skipped")
+        for nodeid in self.mismatched:
+            terminalreporter.write_line(f"Test marked '{READONLY}' changed the collection: {nodeid}", yellow=True)
@@ -0,0 +1,89 @@
+"""
+Гистограмма задержек в стиле HdrHistogram: значения хранятся в логарифмически-линейных корзинах,
+поэтому объем памяти ограничен (не зависит от числа замеров), а относительная погрешность перцентилей ~1.5%
+"""
+
+# Число линейных корзин внутри каждой степени двойки (2 ** _SUB_BUCKET_BITS)
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value: int) -> int:
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + ((value >> shift) - _SUB_BUCKET_HALF)
+
+
+def _bucket_bounds(index: int):
+    if index < _SUB_BUCKET_COUNT:
+        return index, index
+    shift = (index - _SUB_BUCKET_COUNT) // _SUB_BUCKET_HALF + 1
+    sub_bucket = (index - _SUB_BUCKET_COUNT) % _SUB_BUCKET_HALF + _SUB_BUCKET_HALF
+    return sub_bucket << shift, ((sub_bucket + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Класс для накопления задержек (в секундах) и расчета перцентилей.
+    Внутри значения хранятся в микросекундах
+    """
+
+    __slots__ = ("_counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self._counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds: float, count: int = 1):
+        value = max(int(seconds * 1_000_000), 0)
+        index = _bucket_index(value)
+        self._counts[index] = self._counts.get(index, 0) + count
+        self.count += count
+        self.total += seconds * count
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Значение (в секундах), которое не превышают percent процентов замеров
+        """
+        if not self.count:
+            return 0.0
+        rank = max(int(self.count * percent / 100.0 + 0.5), 1)
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(_bucket_bounds(index)[1] / 1_000_000, self.max)
+        return self.max
+
+    def buckets(self) -> list:
+        """
+        Непустые корзины: [(нижняя граница, верхняя граница, число замеров)], границы в секундах
+        """
+        return [(_bucket_bounds(index)[0] / 1_000_000, _bucket_bounds(index)[1] / 1_000_000, self._counts[index])
+                for index in sorted(self._counts)]
+
+    def summary(self, percentiles=(50, 90, 99)) -> dict:
+        result = {"count": self.count, "min": self.min or 0.0, "mean": self.mean}
+        result.update({f"p{percent}": self.percentile(percent) for percent in percentiles})
+        result["max"] = self.max or 0.0
+        return result
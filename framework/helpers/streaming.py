@@ -0,0 +1,157 @@
+import codecs
+import json
+
+"""
+Потоковый разбор ответа вида {"<ключ>": [<элемент>, <элемент>, ...]}: элементы списка возвращаются по одному
+по мере получения данных из сокета, в памяти держится только еще не разобранный остаток тела ответа
+"""
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    """
+    Буфер разбора: текст, текущая позиция и признак окончания данных
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        """
+        Дочитать следующую порцию данных. Разобранная часть текста при этом отбрасывается
+        """
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.text = self.text[self.pos:] + self._utf8.decode(b"", final=True)
+            self.eof = True
+        else:
+            self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> str:
+        """
+        Пропустить пробельные символы и вернуть следующий символ ("" в конце данных)
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, symbols) -> str:
+        symbol = self.skip_whitespace()
+        if not symbol or symbol not in symbols:
+            raise ValueError(f"Expected one of {list(symbols)} but got '{symbol}' in streamed json")
+        self.pos += 1
+        return symbol
+
+    def value(self):
+        """
+        Разобрать следующее json значение, при необходимости дочитывая данные
+        """
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # Число в конце буфера может быть неполным: принимаем его, только если за ним уже есть другие символы
+            complete = end < len(self.text) or self.eof or not isinstance(value, (int, float))
+            if complete or not self.more():
+                self.pos = end
+                return value
+
+
+def iter_json_array(chunks, key="result"):
+    """
+    Вернуть по одному элементы списка по ключу key из потока байтовых порций chunks
+    """
+    buffer = _Buffer(chunks)
+    buffer.expect("{")
+    if buffer.skip_whitespace() == "}":
+        return
+    while True:
+        name = buffer.value()
+        buffer.expect(":")
+        if name == key:
+            buffer.expect("[")
+            if buffer.skip_whitespace() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(",]") == "]":
+                        break
+        else:
+            buffer.value()
+        if buffer.expect(",}") == "}":
+            return
+
+
+class StreamedResponse:
+    """
+    Ответ, тело которого разбирается потоково. Итерация возвращает записи по мере их получения.
+    Соединение возвращается в пул после окончания итерации или вызова close()
+    """
+
+    def __init__(self, response, key="result", on_record=(), timing=None, on_close=None):
+        """
+        :param on_record: функции, которые вызываются для каждой записи при ее получении (проверка, индексация)
+        :param timing: разбивка времени запроса по этапам (RequestTiming), загрузка тела дописывается при закрытии
+        :param on_close: функция, которая вызывается с этим объектом один раз при закрытии ответа
+        """
+        self.status_code = response.status_code
+        self.time = response.elapsed.total_seconds()
+        self.headers = response.headers
+        self.timing = timing
+        self.records_count = 0
+        self.bytes_received = 0
+        self._response = response
+        self._key = key
+        self._on_record = on_record
+        self._on_close = on_close
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        try:
+            for record in iter_json_array(self._chunks(), self._key):
+                for callback in self._on_record:
+                    callback(record)
+                self.records_count += 1
+                yield record
+        finally:
+            self.close()
+
+    def _chunks(self):
+        for chunk in self._response.iter_content(chunk_size=64 * 1024):
+            self.bytes_received += len(chunk)
+            yield chunk
+
+    def close(self):
+        self._response.close()
+        if self._closed:
+            return
+        self._closed = True
+        if self.timing is not None:
+            self.timing.finish_download()
+        if self._on_close is not None:
+            self._on_close(self)
@@ -0,0 +1,162 @@
+import threading
+import time
+from dataclasses import dataclass, field, fields
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+"""
+Разбивка времени запроса по этапам: ожидание соединения из пула, установка соединения, отправка запроса,
+ожидание первого байта ответа (заголовков), загрузка тела и разбор json.
+Этапы замеряются в соединениях и пуле urllib3, результаты пишутся в объект текущего запроса потока
+"""
+
+_current = threading.local()
+
+
+@dataclass
+class RequestTiming:
+    """
+    Структура с длительностями этапов запроса (секунды).
+    При повторах запроса все этапы и total относятся к последней попытке, ожидание перед повторами
+    (retry_wait) и число попыток (attempts) записываются отдельно
+    """
+    acquire: float = 0.0
+    connect: float = 0.0
+    send: float = 0.0
+    first_byte: float = 0.0
+    download: float = 0.0
+    decode: float = 0.0
+    total: float = 0.0
+    retry_wait: float = 0.0
+    attempts: int = 0
+    reused: bool = False
+    _headers_received: float = field(default=0.0, repr=False)
+
+    def __enter__(self):
+        _current.timing = self
+        self.start_attempt()
+        return self
+
+    def start_attempt(self):
+        """
+        Начать замер очередной попытки запроса (замеры предыдущей попытки сбрасываются)
+        """
+        self.acquire = self.connect = self.send = self.first_byte = self.download = self.decode = 0.0
+        self.reused = False
+        self._headers_received = 0.0
+        self.attempts += 1
+        self._started = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        finished = time.perf_counter()
+        _current.timing = None
+        self.total = finished - self._started
+        if self._headers_received:
+            self.download = finished - self._headers_received
+
+    def finish_download(self):
+        """
+        Отметить окончание загрузки тела ответа, которое читается после выхода из контекста (потоковый ответ)
+        """
+        finished = time.perf_counter()
+        if self._headers_received:
+            self.download = finished - self._headers_received
+        self.total = finished - self._started
+
+    @property
+    def network(self) -> float:
+        """
+        Время на соединение и передачу данных (без ожидания ответа сервера и разбора json)
+        """
+        return self.acquire + self.connect + self.send + self.download
+
+    def to_dict(self) -> dict:
+        result = {item.name: getattr(self, item.name) for item in fields(self) if not item.name.startswith("_")}
+        result["network"] = self.network
+        return result
+
+    def __str__(self):
+        return ", ".join(f"{name}={value * 1000:.1f}ms" if isinstance(value, float) else f"{name}={value}"
+                         for name, value in self.to_dict().items())
+
+
+def current_timing():
+    return getattr(_current, "timing", None)
+
+
+class _TimedConnectionMixin:
+    """
+    Замер установки соединения, отправки запроса и ожидания заголовков ответа
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            timing = current_timing()
+            if timing is not None:
+                timing.connect = time.perf_counter() - started
+
+    def request(self, *args, **kwargs):
+        timing = current_timing()
+        if timing is not None:
+            timing.connect = 0.0
+        started = time.perf_counter()
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            if timing is not None:
+                # Соединение устанавливается внутри отправки первого запроса
+                timing.send = time.perf_counter() - started - timing.connect
+
+    def getresponse(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            timing = current_timing()
+            if timing is not None:
+                timing._headers_received = time.perf_counter()
+                timing.first_byte = timing._headers_received - started
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedPoolMixin:
+    """
+    Замер ожидания свободного соединения в пуле и признак переиспользования соединения
+    """
+
+    def _get_conn(self, timeout=None):
+        started = time.perf_counter()
+        conn = super()._get_conn(timeout)
+        timing = current_timing()
+        if timing is not None:
+            timing.acquire = time.perf_counter() - started
+            timing.reused = getattr(conn, "sock", None) is not None
+        return conn
+
+
+class TimedHTTPConnectionPool(_TimedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(_TimedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_adapter(adapter):
+    """
+    Подключить замеры этапов запроса к транспорту requests (HTTPAdapter и его наследникам)
+    """
+    adapter.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool,
+                                                  "https": TimedHTTPSConnectionPool}
+    return adapter
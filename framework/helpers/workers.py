@@ -0,0 +1,115 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+"""
+Изоляция воркеров pytest-xdist: у каждого воркера своя локальная замена сервиса,
+а сброс общей коллекции удаленного сервиса и тесты всей коллекции выполняются, только когда с ней
+не работают другие воркеры
+"""
+
+
+def _lock_file(file, exclusive: bool = True):
+    if fcntl is not None:
+        # Смена режима уже захваченной блокировки не атомарна: сначала снимается прежняя блокировка
+        fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK ждет около 10 секунд, затем бросает исключение
+            continue
+
+
+def _unlock_file(file):
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_UN)
+        return
+    file.seek(0)
+    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def worker_id() -> str:
+    """
+    Имя текущего воркера xdist ('gw0', 'gw1', ...) или 'master' без xdist
+    """
+    return os.getenv("PYTEST_XDIST_WORKER", "master")
+
+
+def workers_count() -> int:
+    return int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1"))
+
+
+def is_worker() -> bool:
+    return worker_id() != "master"
+
+
+class CollectionLock:
+    """
+    Класс межпроцессной блокировки общей коллекции сервиса (файловая блокировка, общая для всех воркеров).
+    Разделяемую блокировку (shared) держат воркеры, которые работают со своими записями коллекции,
+    исключительную (exclusive) - воркер, который сбрасывает коллекцию или проверяет ее целиком.
+    Блокировка повторно входимая в пределах процесса: вложенный захват не ждет сам себя, исключительный захват
+    внутри разделяемого меняет режим до выхода из него. На Windows блокировка всегда исключительная
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._modes = []
+        self._lock = threading.RLock()
+
+    @property
+    def is_exclusive(self) -> bool:
+        return any(self._modes)
+
+    def acquire(self, exclusive: bool = True):
+        self._lock.acquire()
+        was_exclusive = self.is_exclusive
+        if not self._modes:
+            self._file = open(self.path, "a")
+        self._modes.append(exclusive)
+        if len(self._modes) == 1 or (fcntl is not None and self.is_exclusive != was_exclusive):
+            _lock_file(self._file, self.is_exclusive)
+
+    def release(self):
+        was_exclusive = self.is_exclusive
+        self._modes.pop()
+        if not self._modes:
+            _unlock_file(self._file)
+            self._file.close()
+            self._file = None
+        elif fcntl is not None and self.is_exclusive != was_exclusive:
+            _lock_file(self._file, self.is_exclusive)
+        self._lock.release()
+
+    @contextmanager
+    def shared(self):
+        self.acquire(exclusive=False)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @contextmanager
+    def exclusive(self):
+        self.acquire(exclusive=True)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
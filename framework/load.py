@@ -0,0 +1,379 @@
+import argparse
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from framework.api import API
+from framework.helpers.credentials import Credentials
+from framework.helpers.data_factory import DataFactory
+from framework.helpers.stats import LatencyHistogram
+from framework.metrics import MetricsRegistry, set_registry
+
+"""
+Нагрузочный прогон на основе класса API.
+Пример: python -m framework.load --mix get_character_by_name=70,get_all_characters=20,put_character=10 \
+            --workers 10 --duration 60 --summary load_summary.json
+С опцией --rate запросы отправляются с постоянной частотой (открытая модель нагрузки),
+задержка считается от запланированного момента отправки запроса
+"""
+
+
+class _Operations:
+    """
+    Операции нагрузки: каждая выполняет один запрос к API и возвращает SimpleResponse
+    """
+
+    NAMES = 10 ** 6
+
+    def __init__(self, api: API, names: list):
+        self.api = api
+        self.names = names or ["Dracula"]
+        self._factory = DataFactory().factory("LOAD", size=self.NAMES)
+        self._counter = iter(range(sys.maxsize))
+        self._posted = []
+        self._lock = threading.Lock()
+
+    def get_all_characters(self, rng):
+        return self.api.get_all_characters()
+
+    def get_character_by_name(self, rng):
+        return self.api.get_character_by_name(rng.choice(self.names))
+
+    def put_character(self, rng):
+        return self.api.put_character({"name": rng.choice(self.names), "other_aliases": "UPD by load test"})
+
+    def post_character(self, rng):
+        with self._lock:
+            # Имена повторяются по кругу: к этому моменту записи с первыми именами уже удалены или не добавлены
+            character_data = self._factory(next(self._counter) % self.NAMES)
+        response = self.api.post_character(character_data)
+        if response.status_code == 200:
+            with self._lock:
+                self._posted.append(character_data["name"])
+        return response
+
+    def delete_character_by_name(self, rng):
+        # Удаляются записи, добавленные этим же прогоном, чтобы не разрушать исходную коллекцию
+        with self._lock:
+            name = self._posted.pop() if self._posted else "Nonexistent load test name"
+        return self.api.delete_character_by_name(name)
+
+    def post_reset_collection(self, rng):
+        return self.api.post_reset_collection()
+
+
+OPERATIONS = ("get_all_characters", "get_character_by_name", "put_character", "post_character",
+              "delete_character_by_name", "post_reset_collection")
+
+
+def parse_mix(mix: str) -> dict:
+    """
+    "get_character_by_name=70,get_all_characters=20,put_character=10" -> {операция: вес}
+    """
+    weights = {}
+    for item in mix.split(","):
+        operation, _, weight = item.strip().partition("=")
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{operation}'. Available operations: {OPERATIONS}")
+        weights[operation] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"Mix '{mix}' has no operations with positive weight")
+    return weights
+
+
+class LoadStats:
+    """
+    Потокобезопасное накопление результатов нагрузки: задержки по операциям и коды ответов
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.histograms = {}
+        self.latency = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.status_codes = Counter()
+        self.operation_status_codes = Counter()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def record(self, operation, status, latency, service_time=None):
+        """
+        :param latency: задержка ответа (в открытой модели - от запланированного момента отправки)
+        :param service_time: время выполнения самого запроса (только для открытой модели)
+        """
+        with self._lock:
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = LatencyHistogram()
+            histogram.record(latency)
+            self.latency.record(latency)
+            if service_time is not None:
+                self.service_time.record(service_time)
+            self.status_codes[status] += 1
+            self.operation_status_codes[(operation, status)] += 1
+            self.requests += 1
+
+    def snapshot(self):
+        with self._lock:
+            latency = LatencyHistogram()
+            latency.merge(self.latency)
+            return self.requests, Counter(self.status_codes), latency
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            summary = {"elapsed": elapsed,
+                       "requests": self.requests,
+                       "rps": self.requests / elapsed if elapsed else 0.0,
+                       "status_codes": {str(status): count for status, count in sorted(self.status_codes.items(),
+                                                                                       key=str)},
+                       "error_rate": _error_rate(self.status_codes, self.requests),
+                       "latency": self.latency.summary(percentiles=(50, 90, 99)),
+                       "operations": {operation: {"latency": histogram.summary(percentiles=(50, 90, 99)),
+                                                  "status_codes": {str(status): count for (name, status), count
+                                                                   in sorted(self.operation_status_codes.items(),
+                                                                             key=str)
+                                                                   if name == operation}}
+                                      for operation, histogram in sorted(self.histograms.items())}}
+            if self.service_time.count:
+                summary["service_time"] = self.service_time.summary(percentiles=(50, 90, 99))
+            return summary
+
+
+def _is_error(status) -> bool:
+    return not (isinstance(status, int) and 200 <= status < 300)
+
+
+def _error_rate(status_codes: Counter, requests: int) -> float:
+    return sum(count for status, count in status_codes.items() if _is_error(status)) / requests if requests else 0.0
+
+
+class LoadRunner:
+    """
+    Класс для нагрузки сервиса смесью операций API: workers потоков выполняют запросы один за другим
+    в течение duration секунд или пока не будет выполнено requests запросов
+    """
+
+    def __init__(self, api: API, mix: dict, workers: int = 10, duration: float = None, requests: int = None,
+                 names: list = None, seed: int = None):
+        if duration is None and requests is None:
+            raise ValueError("Set duration or requests count")
+        self.api = api
+        self.mix = mix
+        self.workers = workers
+        self.duration = duration
+        self.requests = requests
+        self.seed = seed
+        self.stats = LoadStats()
+        self._operations = _Operations(api, names)
+        self._names = list(mix)
+        self._weights = list(mix.values())
+        self._budget = iter(range(requests)) if requests is not None else None
+        self._budget_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def execute(self, operation, rng, intended=None):
+        """
+        Выполнить операцию. Если задан intended (запланированный момент отправки), задержка считается от него:
+        так в задержку попадает и время ожидания свободного потока, когда сервис не успевает отвечать
+        """
+        started = time.perf_counter()
+        try:
+            status = getattr(self._operations, operation)(rng).status_code
+        except Exception as error:
+            # Любая ошибка операции (транспорт, разбор ответа) учитывается как ошибка, а не останавливает поток
+            status = type(error).__name__
+        finished = time.perf_counter()
+        if intended is None:
+            self.stats.record(operation, status, finished - started)
+        else:
+            self.stats.record(operation, status, finished - intended, service_time=finished - started)
+
+    def _take_request(self) -> bool:
+        if self._budget is None:
+            return True
+        with self._budget_lock:
+            return next(self._budget, None) is not None
+
+    def _worker(self, number):
+        rng = random.Random(None if self.seed is None else self.seed + number)
+        while not self._stop.is_set() and self._take_request():
+            self.execute(rng.choices(self._names, self._weights)[0], rng)
+
+    def run(self, report=None, interval: float = 1.0) -> dict:
+        """
+        Выполнить нагрузку. report(строка) вызывается каждые interval секунд с текущими показателями
+        """
+        self.stats = LoadStats()
+        self._stop.clear()
+        deadline = None if self.duration is None else time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(number,), name=f"load_worker_{number}", daemon=True)
+                   for number in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        self._wait(threads, deadline, _LiveReporter(self.stats, report, interval), interval)
+        return self.stats.summary()
+
+    def _wait(self, threads, deadline, reporter, interval):
+        while any(thread.is_alive() for thread in threads):
+            if deadline is not None and time.perf_counter() >= deadline:
+                self._stop.set()
+            threads[0].join(timeout=min(interval, 0.1))
+            reporter.tick()
+        reporter.tick(force=True)
+
+
+class ConstantRateRunner(LoadRunner):
+    """
+    Открытая модель нагрузки: планировщик отправляет запросы с постоянной частотой rate (запросов в секунду)
+    независимо от того, когда приходят ответы. Запросы выполняют workers потоков; если все потоки заняты,
+    запросы ждут в очереди, и это ожидание входит в задержку (поправка на coordinated omission)
+    """
+
+    def __init__(self, api: API, mix: dict, rate: float, workers: int = 10, duration: float = None,
+                 requests: int = None, names: list = None, seed: int = None):
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        super().__init__(api, mix, workers=workers, duration=duration, requests=requests, names=names, seed=seed)
+        self.rate = rate
+        self._queue = queue.Queue()
+
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def _schedule(self, deadline):
+        rng = random.Random(self.seed)
+        started = time.perf_counter()
+        for number in range(sys.maxsize):
+            intended = started + number / self.rate
+            if deadline is not None and intended >= deadline or not self._take_request():
+                break
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._queue.put((rng.choices(self._names, self._weights)[0], intended))
+        for _ in range(self.workers):
+            self._queue.put(None)
+
+    def _open_loop_worker(self, number):
+        rng = random.Random(None if self.seed is None else self.seed + number)
+        for job in iter(self._queue.get, None):
+            operation, intended = job
+            self.execute(operation, rng, intended=intended)
+
+    def run(self, report=None, interval: float = 1.0) -> dict:
+        self.stats = LoadStats()
+        self._stop.clear()
+        deadline = None if self.duration is None else time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self._open_loop_worker, args=(number,), name=f"load_worker_{number}",
+                                    daemon=True)
+                   for number in range(self.workers)]
+        threads.append(threading.Thread(target=self._schedule, args=(deadline,), name="load_scheduler", daemon=True))
+        for thread in threads:
+            thread.start()
+        self._wait(threads, None, _LiveReporter(self.stats, report, interval, backlog=self.backlog), interval)
+        summary = self.stats.summary()
+        summary["target_rate"] = self.rate
+        return summary
+
+
+class _LiveReporter:
+    """
+    Периодический вывод текущих RPS, доли ошибок по кодам ответов и перцентилей задержки
+    """
+
+    def __init__(self, stats: LoadStats, report, interval, backlog=None):
+        self.stats = stats
+        self.report = report
+        self.interval = interval
+        self.backlog = backlog
+        self._last_time = time.perf_counter()
+        self._last_requests = 0
+
+    def tick(self, force=False):
+        now = time.perf_counter()
+        if self.report is None or (not force and now - self._last_time < self.interval):
+            return
+        requests, status_codes, latency = self.stats.snapshot()
+        rps = (requests - self._last_requests) / (now - self._last_time) if now > self._last_time else 0.0
+        errors = ", ".join(f"{status}: {count / requests:.1%}" for status, count in sorted(status_codes.items(),
+                                                                                            key=str)
+                           if _is_error(status))
+        self.report(f"[{now - self.stats.started:7.1f}s] requests={requests} rps={rps:.1f} "
+                    f"p50={latency.percentile(50) * 1000:.1f}ms p90={latency.percentile(90) * 1000:.1f}ms "
+                    f"p99={latency.percentile(99) * 1000:.1f}ms errors=[{errors}]"
+                    + (f" backlog={self.backlog()}" if self.backlog else ""))
+        self._last_time = now
+        self._last_requests = requests
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m framework.load", description="Load test of the characters API")
+    parser.add_argument("--mix", default="get_character_by_name=70,get_all_characters=20,put_character=10",
+                        help=f"Comma separated operation=weight pairs. Operations: {', '.join(OPERATIONS)}")
+    parser.add_argument("--workers", type=int, default=10, help="Number of concurrent workers")
+    parser.add_argument("--rate", type=float,
+                        help="Open-loop mode: send requests at this constant rate (requests per second) "
+                             "and measure latency from the intended send time")
+    parser.add_argument("--duration", type=float, help="Duration of the load in seconds")
+    parser.add_argument("--requests", type=int, help="Total number of requests")
+    parser.add_argument("--summary", default="load_summary.json", help="Path of the summary file")
+    parser.add_argument("--interval", type=float, default=1.0, help="Live report interval in seconds")
+    parser.add_argument("--seed", type=int, help="Random seed of the workers")
+    parser.add_argument("--service-address", help="Address of the service (default is the remote test service)")
+    parser.add_argument("--local-service", action="store_true", help="Run against in-process stand-in of the service")
+    parser.add_argument("--metrics", help="Write metrics of requests in OpenMetrics text format to this file")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve metrics of requests on this local port while the load is running")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+    service = None
+    if args.local_service:
+        # Локальная замена сервиса (http.server) загружается только с опцией --local-service
+        from framework.local_service import LocalService
+        service = LocalService(auth_header=Credentials().basic_auth_header()).start()
+    registry = MetricsRegistry() if args.metrics or args.metrics_port is not None else None
+    set_registry(registry)
+    metrics_server = registry.serve(args.metrics_port) if args.metrics_port is not None else None
+    if metrics_server:
+        print(f"Metrics are served on {metrics_server.address}")
+    try:
+        with API(pool_size=args.workers, service_address=service.address if service else args.service_address) \
+                as api:
+            content = api.get_all_characters().content
+            names = [record["name"] for record in content.get("result", [])] if isinstance(content, dict) else None
+            if args.rate:
+                runner = ConstantRateRunner(api, parse_mix(args.mix), rate=args.rate, workers=args.workers,
+                                            duration=args.duration, requests=args.requests, names=names,
+                                            seed=args.seed)
+            else:
+                runner = LoadRunner(api, parse_mix(args.mix), workers=args.workers, duration=args.duration,
+                                    requests=args.requests, names=names, seed=args.seed)
+            summary = runner.run(report=print, interval=args.interval)
+    finally:
+        if service:
+            service.stop()
+        if metrics_server:
+            metrics_server.stop()
+        set_registry(None)
+    if args.metrics:
+        registry.write(args.metrics)
+        print(f"Metrics are written to '{args.metrics}'")
+    summary["config"] = vars(args)
+    with open(args.summary, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+    print(json.dumps({key: summary[key] for key in ("requests", "rps", "error_rate", "latency")}, indent=2))
+    print(f"Summary is written to '{args.summary}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import json
+import math
+import re
+import threading
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from framework.helpers.reporting import step
+
+"""
+Локальная замена тестируемого сервиса (in-process HTTP сервер).
+Реализует /characters, /character (GET/POST/PUT/DELETE), /reset, Basic авторизацию,
+ограничение на число записей в коллекции и ответ 414 на слишком длинный URL
+"""
+
+DEFAULT_CHARACTERS = [
+    {"name": "Nomad", "universe": "Marvel Universe", "education": "High school (unfinished)",
+     "weight": 79.0, "height": 1.75, "identity": "Secret", "other_aliases": "Jack Monroe, Bucky"},
+    {"name": "Mary Jane Watson", "universe": "Marvel Universe", "education": "College student",
+     "weight": 54.0, "height": 1.73, "identity": "Publicly known", "other_aliases": "MJ, Mary Jane Parker"},
+    {"name": "Dracula", "universe": "Marvel Universe", "education": "Unrevealed",
+     "weight": 86.0, "height": 1.96, "identity": "Publicly known", "other_aliases": "Vlad Dracula, Lord of Vampires"},
+    {"name": "Black Widow", "universe": "Marvel Universe", "education": "Red Room Academy",
+     "weight": 59.0, "height": 1.7, "identity": "Secret", "other_aliases": "Natasha Romanoff"},
+    {"name": "Black Widow", "universe": "Earth-1610", "education": "Red Room Academy",
+     "weight": 58.0, "height": 1.69, "identity": "Secret", "other_aliases": "Natalia Romanova"},
+    {"name": "Wolverine", "universe": "Marvel Universe", "education": "Unrevealed",
+     "weight": 136.0, "height": 1.6, "identity": "Secret", "other_aliases": "Logan, Weapon X"},
+    {"name": "Hulk", "universe": "Marvel Universe", "education": "Ph.D. in nuclear physics",
+     "weight": 635.0, "height": 2.44, "identity": "Publicly known", "other_aliases": "Bruce Banner"},
+    {"name": "Storm", "universe": "Marvel Universe", "education": "High school",
+     "weight": 66.0, "height": 1.8, "identity": "Publicly known", "other_aliases": "Ororo Munroe"},
+    {"name": "Daredevil", "universe": "Marvel Universe", "education": "Columbia Law School",
+     "weight": 84.0, "height": 1.83, "identity": "Secret", "other_aliases": "Matt Murdock"},
+    {"name": "Deadpool", "universe": "Marvel Universe", "education": "Unrevealed",
+     "weight": 95.0, "height": 1.88, "identity": "Publicly known", "other_aliases": "Wade Wilson"},
+]
+
+
+class LocalService:
+    """
+    Класс для запуска локальной замены тестируемого сервиса в отдельном потоке
+    """
+
+    limit = 500
+    max_url_length = 8192
+    max_field_length = 350
+
+    _string_fields = ("name", "universe", "education", "identity", "other_aliases")
+    _numeric_fields = ("weight", "height")
+    _required_fields = ("name", "universe", "education", "weight", "height", "identity")
+    _string_pattern = re.compile(r"^[\w\s,.'()\-]+$")
+
+    def __init__(self, auth_header: str, host: str = "127.0.0.1", port: int = 0, characters: list = None):
+        self._auth_header = auth_header
+        self._initial = deepcopy(DEFAULT_CHARACTERS if characters is None else characters)
+        self._collection = deepcopy(self._initial)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.service = self
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        with step("Start local service on {}", self.address):
+            self._thread = threading.Thread(target=self._server.serve_forever, name="local_service", daemon=True)
+            self._thread.start()
+            return self
+
+    def stop(self):
+        with step("Stop local service"):
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+
+    def is_authorized(self, header) -> bool:
+        return header == self._auth_header
+
+    # Обработка запросов. Каждый метод возвращает пару (статус код, тело ответа)
+    def get_characters(self, params):
+        with self._lock:
+            return 200, {"result": deepcopy(self._collection)}
+
+    def get_character(self, params):
+        name = params.get("name")
+        if not name:
+            return 400, {"error": "name parameter is required"}
+        with self._lock:
+            for record in self._collection:
+                if record["name"] == name:
+                    return 200, {"result": deepcopy(record)}
+        return 400, {"error": "No such name"}
+
+    def post_character(self, data):
+        error = self._validate(data, required=self._required_fields)
+        if error:
+            return 400, {"error": error}
+        record = self._normalize(data)
+        with self._lock:
+            if any(item["name"] == record["name"] for item in self._collection):
+                return 400, {"error": f"{record['name']} is already exists"}
+            if len(self._collection) >= self.limit:
+                return 400, {"error": f"Collection can't contain more than {self.limit} items"}
+            self._collection.append(record)
+            return 200, {"result": deepcopy(record)}
+
+    def put_character(self, data):
+        error = self._validate(data, required=("name",))
+        if error:
+            return 400, {"error": error}
+        if len(data) == 1:
+            return 400, {"error": "No fields to update"}
+        update = self._normalize(data)
+        with self._lock:
+            records = [record for record in self._collection if record["name"] == update["name"]]
+            if not records:
+                return 400, {"error": "No such name"}
+            for record in records:
+                record.update(update)
+            return 200, {"result": deepcopy(records[0])}
+
+    def delete_character(self, params):
+        name = params.get("name")
+        if not name:
+            return 400, {"error": "name parameter is required"}
+        with self._lock:
+            collection = [record for record in self._collection if record["name"] != name]
+            if len(collection) == len(self._collection):
+                return 400, {"error": "No such name"}
+            self._collection = collection
+        return 200, {"result": f"Hero {name} is deleted"}
+
+    def reset(self, params):
+        with self._lock:
+            self._collection = deepcopy(self._initial)
+        return 200, {"result": "Collection is reset"}
+
+    def _validate(self, data, required):
+        if not isinstance(data, dict):
+            return "Request body must be a json object"
+        errors = [f"{field}: ['unknown field']" for field in data
+                  if field not in self._string_fields + self._numeric_fields]
+        errors += [f"{field}: ['required field']" for field in required if field not in data]
+        for field, value in data.items():
+            if field in self._string_fields:
+                error = self._validate_string(value)
+            elif field in self._numeric_fields:
+                error = self._validate_number(value)
+            else:
+                continue
+            if error:
+                errors.append(f"{field}: ['{error}']")
+        return "; ".join(errors)
+
+    def _validate_string(self, value):
+        if value is None:
+            return "null value not allowed"
+        if not isinstance(value, str):
+            return "must be of string type"
+        if not value:
+            return "empty values not allowed"
+        if len(value) > self.max_field_length:
+            return f"max length is {self.max_field_length}"
+        if not self._string_pattern.match(value):
+            return "value contains forbidden symbols"
+        return None
+
+    @staticmethod
+    def _validate_number(value):
+        if value is None:
+            return "null value not allowed"
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return "must be of number type"
+        if value == "":
+            return "empty values not allowed"
+        try:
+            number = float(value)
+        except ValueError:
+            return "must be of number type"
+        if not math.isfinite(number):
+            return "must be of number type"
+        return None
+
+    def _normalize(self, data):
+        return {field: float(value) if field in self._numeric_fields else value for field, value in data.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Обработчик HTTP запросов локального сервиса
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело ответа пишутся отдельно, без TCP_NODELAY каждый ответ ждет delayed ACK клиента
+    disable_nagle_algorithm = True
+
+    _routes = {
+        ("GET", "characters"): "get_characters",
+        ("GET", "character"): "get_character",
+        ("POST", "character"): "post_character",
+        ("PUT", "character"): "put_character",
+        ("DELETE", "character"): "delete_character",
+        ("POST", "reset"): "reset",
+    }
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_error(self, code, message=None, explain=None):
+        # Слишком длинную строку запроса (> 64 KiB) http.server отклоняет сам, до вызова обработчика.
+        # Отвечаем так же, как на длинный URL, но соединение закрываем, так как остаток запроса не прочитан
+        if code == 414:
+            self._send(414, b"Request-URI Too Large", "text/plain")
+            self.close_connection = True
+            return
+        super().send_error(code, message, explain)
+
+    def _handle(self, method):
+        service = self.server.service
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if len(self.path) > service.max_url_length:
+            return self._send(414, b"Request-URI Too Large", "text/plain")
+        if not service.is_authorized(self.headers.get("Authorization")):
+            return self._send_json(401, {"error": "Unauthorized"})
+        url = urlsplit(self.path)
+        if not url.path.startswith("/v2/"):
+            return self._send_json(404, {"error": "Not found"})
+        handler_name = self._routes.get((method, url.path[len("/v2/"):].strip("/")))
+        if handler_name is None:
+            return self._send_json(404, {"error": "Not found"})
+        if method in ("POST", "PUT") and handler_name != "reset":
+            try:
+                argument = json.loads(body) if body else None
+            except ValueError:
+                return self._send_json(400, {"error": "Invalid json"})
+        else:
+            argument = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        status_code, content = getattr(service, handler_name)(argument)
+        self._send_json(status_code, content)
+
+    def _send_json(self, status_code, content):
+        self._send(status_code, json.dumps(content).encode("utf-8"), "application/json")
+
+    def _send(self, status_code, body: bytes, content_type):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "keep-alive")
+        self.end_headers()
+        self.wfile.write(body)
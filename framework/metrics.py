@@ -0,0 +1,220 @@
+import os
+import threading
+
+"""
+Метрики запросов к API в текстовом формате OpenMetrics: число запросов по методам и кодам ответа, гистограммы
+задержек, повторы, объем переданных данных, время проверки схем ответов.
+Метрики собираются в активный реестр (set_registry), в конце прогона пишутся в файл и/или отдаются по HTTP.
+Пример: pytest --metrics=metrics.txt или python -m framework.load --metrics=metrics.txt
+"""
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+VALIDATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Класс счетчика с метками: {значения меток: значение}
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}_total{_labels(self.labels, label_values)} {_number(value)}"
+
+
+class Histogram:
+    """
+    Класс гистограммы с метками: число наблюдений в каждой корзине (накопительно), сумма и количество
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            counts, total = self._values.get(label_values, ([0] * (len(self.buckets) + 1), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._values[label_values] = (counts, total + value)
+
+    def count(self, *label_values) -> int:
+        with self._lock:
+            counts, _ = self._values.get(label_values, ((), 0.0))
+            return sum(counts)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((label_values, (list(counts), total))
+                            for label_values, (counts, total) in self._values.items())
+        for label_values, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"), ), counts):
+                cumulative += count
+                le = 'le="{}"'.format("+Inf" if bound == float("inf") else _number(float(bound)))
+                yield f"{self.name}_bucket{_labels(self.labels, label_values, [le])} {cumulative}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {_number(float(total))}"
+
+
+class MetricsRegistry:
+    """
+    Класс реестра метрик прогона. Все методы потокобезопасны
+    """
+
+    def __init__(self):
+        self.requests = Counter("api_requests", "Requests to the API by method, endpoint and status code",
+                                ("method", "endpoint", "status"))
+        self.errors = Counter("api_request_errors", "Requests to the API finished with an exception",
+                              ("method", "endpoint", "error"))
+        self.latency = Histogram("api_request_duration_seconds", "Duration of requests to the API",
+                                 ("method", "endpoint"))
+        self.retries = Counter("api_request_retries", "Retries of requests to the API by reason",
+                               ("method", "endpoint", "reason"))
+        self.bytes_sent = Counter("api_request_bytes", "Size of request bodies sent to the API",
+                                  ("method", "endpoint"))
+        self.bytes_received = Counter("api_response_bytes", "Size of response bodies received from the API",
+                                      ("method", "endpoint"))
+        self.schema_validation = Histogram("schema_validation_duration_seconds", "Duration of schema validation",
+                                           ("schema", ), buckets=VALIDATION_BUCKETS)
+        self.families = (self.requests, self.errors, self.latency, self.retries, self.bytes_sent,
+                         self.bytes_received, self.schema_validation)
+
+    def record_request(self, method, endpoint, status, duration, bytes_sent=0, bytes_received=0):
+        method = method.upper()
+        self.requests.inc(method, endpoint, str(status))
+        self.latency.observe(duration, method, endpoint)
+        self.bytes_sent.inc(method, endpoint, amount=bytes_sent)
+        self.bytes_received.inc(method, endpoint, amount=bytes_received)
+
+    def record_error(self, method, endpoint, error: BaseException):
+        self.errors.inc(method.upper(), endpoint, type(error).__name__)
+
+    def record_retry(self, method, endpoint, reason):
+        self.retries.inc(method.upper(), endpoint, reason)
+
+    def record_schema_validation(self, schema, duration):
+        self.schema_validation.observe(duration, schema if isinstance(schema, str) else "custom")
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families:
+            lines.append(f"# TYPE {family.name} {family.type}")
+            lines.append(f"# HELP {family.name} {_escape(family.documentation)}")
+            lines.extend(family.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path) -> str:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        return path
+
+    def serve(self, port: int = 0, host: str = "127.0.0.1") -> "MetricsServer":
+        return MetricsServer(self, host, port).start()
+
+
+class MetricsServer:
+    """
+    Класс HTTP сервера, который отдает метрики реестра по адресу /metrics (для сбора системой мониторинга)
+    """
+
+    def __init__(self, registry: MetricsRegistry, host="127.0.0.1", port=0):
+        # http.server нужен только при раздаче метрик, поэтому не загружается вместе с модулем
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry_ = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry_.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics_server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+_registry = None
+
+
+def set_registry(registry: MetricsRegistry = None):
+    """
+    Сделать реестр активным (None - отключить сбор метрик)
+    """
+    global _registry
+    _registry = registry
+
+
+def get_registry():
+    return _registry
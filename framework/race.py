@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+
+from framework.api import API
+from framework.helpers.reporting import step
+
+"""
+Конкурентные запросы на изменение данных (POST/PUT/DELETE) с одновременным стартом и проверка результата
+на линеаризуемость: итоговая коллекция и коды ответов должны совпадать с каким-либо последовательным
+выполнением тех же запросов, не противоречащим их реальному порядку (запрос, завершившийся до начала другого,
+в последовательном выполнении идет раньше).
+Модель сервиса: POST добавляет запись, если записи с таким именем нет; PUT обновляет все записи с именем;
+DELETE удаляет все записи с именем; иначе - статус код 400. Предполагается, что данные запросов корректны
+и ограничение на размер коллекции не достигается
+"""
+
+NUMERIC_FIELDS = ("weight", "height")
+
+
+@dataclass
+class RaceOperation:
+    """
+    Структура с описанием одного запроса и его результата (статус код и моменты начала и окончания)
+    """
+    kind: str
+    payload: object
+    status: int = None
+    error: str = None
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.payload if self.kind == "delete" else self.payload.get("name")
+
+    def execute(self, api: API):
+        if self.kind == "post":
+            return api.post_character(self.payload)
+        if self.kind == "put":
+            return api.put_character(self.payload)
+        return api.delete_character_by_name(self.payload)
+
+    def __str__(self):
+        result = self.status if self.error is None else self.error
+        return f"{self.kind.upper()} {self.payload} -> {result} [{self.started:.6f} .. {self.finished:.6f}]"
+
+
+def post(character_data: dict) -> RaceOperation:
+    return RaceOperation("post", dict(character_data))
+
+
+def put(character_data: dict) -> RaceOperation:
+    return RaceOperation("put", dict(character_data))
+
+
+def delete(name: str) -> RaceOperation:
+    return RaceOperation("delete", name)
+
+
+def _normalize(record: dict) -> str:
+    return json.dumps({key: float(value) if key in NUMERIC_FIELDS else value for key, value in record.items()},
+                      sort_keys=True)
+
+
+def _state(records, names) -> dict:
+    """
+    {имя: отсортированный кортеж записей} для имен names
+    """
+    state = {}
+    for record in records:
+        if record.get("name") in names:
+            state.setdefault(record["name"], []).append(_normalize(record))
+    return {name: tuple(sorted(items)) for name, items in state.items()}
+
+
+def apply(state: dict, operation: RaceOperation):
+    """
+    Выполнить запрос на модели: (ожидаемый статус код, новое состояние)
+    """
+    records = state.get(operation.name, ())
+    if operation.kind == "post":
+        if records:
+            return 400, state
+        return 200, {**state, operation.name: (_normalize(operation.payload), )}
+    if not records:
+        return 400, state
+    if operation.kind == "delete":
+        return 200, {name: items for name, items in state.items() if name != operation.name}
+    update = {key: value for key, value in operation.payload.items() if key != "name"}
+    if not update:
+        return 400, state
+    updated = tuple(sorted(_normalize({**json.loads(record), **update}) for record in records))
+    return 200, {**state, operation.name: updated}
+
+
+def find_linearization(initial: dict, operations: list, final: dict):
+    """
+    Найти последовательный порядок запросов, который дает наблюдаемые коды ответов и итоговое состояние.
+    Возвращает список запросов в этом порядке или None
+    """
+    memo = set()
+
+    def search(state, remaining, order):
+        if not remaining:
+            return list(order) if state == final else None
+        key = (frozenset(remaining), tuple(sorted(state.items())))
+        if key in memo:
+            return None
+        memo.add(key)
+        for index in remaining:
+            operation = operations[index]
+            # Запрос не может идти раньше запроса, который завершился до его начала
+            if any(operations[other].finished < operation.started for other in remaining if other != index):
+                continue
+            status, new_state = apply(state, operation)
+            if status != operation.status:
+                continue
+            order.append(operation)
+            found = search(new_state, remaining - {index}, order)
+            if found is not None:
+                return found
+            order.pop()
+        return None
+
+    return search(initial, frozenset(range(len(operations))), [])
+
+
+@dataclass
+class RaceResult:
+    """
+    Структура с результатом конкурентного прогона: запросы, состояние до и после, найденный последовательный порядок
+    """
+    operations: list
+    initial: dict
+    final: dict
+    linearization: list = None
+    lost: list = field(default_factory=list)
+
+    @property
+    def is_linearizable(self) -> bool:
+        return self.linearization is not None and not self.lost
+
+    def __str__(self):
+        lines = ["Operations:"] + [f"  {operation}" for operation in self.operations]
+        lines.append(f"Initial state: {self.initial}")
+        lines.append(f"Final state: {self.final}")
+        if self.lost:
+            lines.append(f"Requests finished with exception: {[str(operation) for operation in self.lost]}")
+        if self.linearization is None:
+            lines.append("No sequential order of the requests gives the observed responses and final state")
+        else:
+            lines.append("Sequential order: " + " ; ".join(f"{operation.kind.upper()} {operation.name}"
+                                                          for operation in self.linearization))
+        return "\n".join(lines)
+
+
+def run_race(api: API, operations: list, timeout: float = 30.0) -> RaceResult:
+    """
+    Выполнить запросы operations одновременно (каждый в своем потоке, старт по общему барьеру)
+    и проверить результат по модели сервиса. Запросы, не завершившиеся за timeout секунд, считаются потерянными
+    """
+    names = {operation.name for operation in operations}
+    with step("Run {} concurrent requests on names {}", len(operations), sorted(names)):
+        initial = _state(api.get_all_characters().content.get("result"), names)
+        barrier = threading.Barrier(len(operations))
+
+        def worker(operation):
+            try:
+                barrier.wait(timeout)
+                operation.started = time.perf_counter()
+                operation.status = operation.execute(api).status_code
+            except Exception as error:
+                operation.error = f"{type(error).__name__}: {error}"
+            finally:
+                operation.finished = time.perf_counter()
+
+        threads = [threading.Thread(target=worker, args=(operation, ), name=f"race_{index}", daemon=True)
+                   for index, operation in enumerate(operations)]
+        for thread in threads:
+            thread.start()
+        deadline = time.perf_counter() + timeout
+        for thread, operation in zip(threads, operations):
+            thread.join(max(0.0, deadline - time.perf_counter()))
+            if thread.is_alive():
+                # Запрос без ответа за отведенное время считается потерянным, даже если ответ придет позже
+                operation.error = f"TimeoutError: request timed out after {timeout} s"
+                operation.finished = time.perf_counter()
+        final = _state(api.get_all_characters().content.get("result"), names)
+        result = RaceResult(operations, initial, final,
+                            lost=[operation for operation in operations if operation.error is not None])
+        if not result.lost:
+            result.linearization = find_linearization(initial, operations, final)
+        return result
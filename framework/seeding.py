@@ -0,0 +1,119 @@
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from framework.api import API
+from framework.helpers.data_factory import DataFactory
+from framework.helpers.reporting import step
+from framework.helpers.simple_response import SimpleResponse
+
+if TYPE_CHECKING:
+    from framework.async_api import AsyncAPI
+
+"""
+Массовое заполнение коллекции: уникальные записи отправляются параллельно (через AsyncAPI),
+заполнение останавливается при первом ответе об ограничении на размер коллекции
+"""
+
+
+@dataclass
+class SeedSummary:
+    """
+    Структура с итогами заполнения коллекции
+    """
+    requested: int
+    created: list = field(default_factory=list)
+    limit_response: SimpleResponse = None
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def limit_reached(self) -> bool:
+        return self.limit_response is not None
+
+
+# Часть сообщения сервиса об ограничении на размер коллекции ("Collection can't contain more than 500 items")
+LIMIT_MESSAGE = "can't contain more than"
+
+
+def is_limit_error(response: SimpleResponse) -> bool:
+    """
+    Ответ об ограничении на размер коллекции (остальные отказы сервиса считаются ошибками заполнения)
+    """
+    if response.status_code != 400:
+        return False
+    try:
+        content = response.content
+    except ValueError:
+        return False
+    return isinstance(content, dict) and LIMIT_MESSAGE in str(content.get("error", "")).lower()
+
+
+def seed_characters(api: API, n: int, factory=None, concurrency: int = 10, limit_error=is_limit_error) -> SeedSummary:
+    """
+    Добавить в коллекцию до n записей, созданных фабрикой factory(index), выполняя до concurrency запросов
+    одновременно. Заполнение прекращается при первом ответе, для которого limit_error(response) истинно.
+    По умолчанию записи создает фабрика DataFactory текущего воркера со случайным зерном
+    """
+    # AsyncAPI (и asyncio) импортируются при заполнении, а не при загрузке conftest
+    from framework.async_api import AsyncAPI
+    factory = factory or DataFactory.for_worker().factory(size=n)
+    with step("Seed collection with {} characters (concurrency = {})", n, concurrency):
+        summary = SeedSummary(requested=n)
+        started = time.perf_counter()
+        with AsyncAPI(concurrency=concurrency, api=api) as async_api:
+            async_api.run(_seed(async_api, n, factory, limit_error, summary))
+        summary.elapsed = time.perf_counter() - started
+        return summary
+
+
+def cleanup_characters(api: API, summary: SeedSummary, concurrency: int = 10) -> list:
+    """
+    Удалить записи, созданные при заполнении. Возвращает ответы на запросы удаления
+    """
+    from framework.async_api import AsyncAPI
+    with step("Delete {} seeded characters (concurrency = {})", len(summary.created), concurrency):
+        with AsyncAPI(concurrency=concurrency, api=api) as async_api:
+            return async_api.run(async_api.gather(*[async_api.delete_character_by_name(name)
+                                                    for name in summary.created]))
+
+
+def copy_characters(api: API, names, rename) -> list:
+    """
+    Добавить копии записей names с именами rename(name) (например, копии фиксированных записей для воркера).
+    Копии, которые уже есть в коллекции, не добавляются. Возвращает имена добавленных копий
+    """
+    with step("Copy characters {}", list(names)):
+        copies = []
+        for name in names:
+            if api.get_character_by_name(rename(name)).status_code == 200:
+                continue
+            response = api.get_character_by_name(name)
+            if response.status_code != 200:
+                continue
+            character_data = {**response.content["result"], "name": rename(name)}
+            if api.post_character(character_data).status_code == 200:
+                copies.append(character_data["name"])
+        return copies
+
+
+async def _seed(async_api: "AsyncAPI", n, factory, limit_error, summary: SeedSummary):
+    indexes = iter(range(n))
+
+    async def worker():
+        # Итератор общий для всех корутин: каждая берет следующий индекс, пока не закончатся индексы
+        # или не будет достигнут предел коллекции
+        for index in indexes:
+            if summary.limit_reached:
+                return
+            character_data = factory(index)
+            response = await async_api.post_character(character_data)
+            if response.status_code == 200:
+                summary.created.append(character_data["name"])
+            elif limit_error(response):
+                if not summary.limit_reached:
+                    summary.limit_response = response
+            else:
+                summary.errors.append(response)
+
+    await async_api.gather(*[worker() for _ in range(async_api.concurrency)])
@@ -0,0 +1,249 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+from framework.api import API
+from framework.helpers.credentials import Credentials
+from framework.load import ConstantRateRunner, LoadRunner, parse_mix
+
+"""
+Длительный (soak) прогон: нагрузка смесью методов API окнами по window секунд в течение duration секунд,
+коллекция периодически сбрасывается (POST /reset). Для каждого окна сохраняются перцентили задержек
+и объем памяти (RSS) процесса с тестами. По окончании для каждого показателя строится линейный тренд,
+рост считается дрейфом, если он статистически значим (p-value < alpha) и заметен (больше min_change за прогон).
+Пример: python -m framework.soak --duration 14400 --window 60 --reset-interval 600 --summary soak_summary.json
+Код возврата 1, если обнаружен дрейф
+"""
+
+DRIFT_METRICS = ("latency_p50", "latency_p99", "rss")
+
+
+def rss_bytes() -> int:
+    """
+    Текущий объем памяти (RSS) процесса. На Linux - из /proc, иначе - максимальный RSS за время работы процесса
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # На MacOS ru_maxrss в байтах, на остальных системах - в килобайтах
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+def _betacf(a, b, x):
+    # Непрерывная дробь для неполной бета-функции (метод Лентца)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    """
+    Регуляризованная неполная бета-функция I_x(a, b)
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_test_p_value(t: float, df: int) -> float:
+    """
+    Двусторонний p-value для t-статистики с df степенями свободы
+    """
+    if math.isinf(t):
+        return 0.0
+    return _betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def linear_trend(xs, ys) -> dict:
+    """
+    Линейная регрессия ys по xs: наклон, среднее, стандартная ошибка наклона и p-value гипотезы "наклон = 0"
+    """
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx if sxx else 0.0
+    intercept = mean_y - slope * mean_x
+    residuals = sum((y - intercept - slope * x) ** 2 for x, y in zip(xs, ys))
+    stderr = math.sqrt(residuals / (n - 2) / sxx) if n > 2 and sxx else float("inf")
+    if stderr == 0.0:
+        t = float("inf") if slope else 0.0
+    else:
+        t = slope / stderr
+    return {"slope": slope, "mean": mean_y, "stderr": stderr,
+            "p_value": t_test_p_value(t, n - 2) if n > 2 and stderr != float("inf") else 1.0}
+
+
+@dataclass
+class DriftResult:
+    """
+    Структура с результатом проверки одного показателя на дрейф
+    """
+    metric: str
+    windows: int
+    slope_per_hour: float
+    relative_change: float
+    p_value: float
+    drift: bool
+
+
+def detect_drift(windows: list, metric: str, alpha: float = 0.01, min_change: float = 0.1) -> DriftResult:
+    """
+    Проверить рост показателя metric по окнам windows (список словарей с ключами 'time' и metric).
+    relative_change - изменение по тренду за весь прогон относительно среднего значения
+    """
+    points = [(window["time"], window[metric]) for window in windows if window.get(metric) is not None]
+    if len(points) < 3:
+        return DriftResult(metric, len(points), 0.0, 0.0, 1.0, False)
+    xs, ys = zip(*points)
+    trend = linear_trend(xs, ys)
+    change = trend["slope"] * (xs[-1] - xs[0])
+    relative_change = change / trend["mean"] if trend["mean"] else 0.0
+    drift = trend["slope"] > 0 and trend["p_value"] < alpha and relative_change > min_change
+    return DriftResult(metric, len(points), trend["slope"] * 3600, relative_change, trend["p_value"], drift)
+
+
+class SoakRunner:
+    """
+    Класс длительного прогона: нагрузка LoadRunner (или ConstantRateRunner при заданном rate) окнами по window секунд,
+    сброс коллекции каждые reset_interval секунд, замер показателей каждого окна
+    """
+
+    def __init__(self, api: API, mix: dict, workers: int = 10, duration: float = 3600.0, window: float = 60.0,
+                 reset_interval: float = 600.0, rate: float = None, names: list = None, seed: int = None):
+        if window <= 0 or duration < window:
+            raise ValueError(f"Window ({window} s) must be positive and not longer than duration ({duration} s)")
+        self.api = api
+        self.duration = duration
+        self.window = window
+        self.reset_interval = reset_interval
+        self.windows = []
+        if rate:
+            self._runner = ConstantRateRunner(api, mix, rate=rate, workers=workers, duration=window, names=names,
+                                              seed=seed)
+        else:
+            self._runner = LoadRunner(api, mix, workers=workers, duration=window, names=names, seed=seed)
+
+    def run(self, report=None) -> list:
+        started = time.perf_counter()
+        last_reset = started
+        while time.perf_counter() - started + self.window <= self.duration:
+            if self.reset_interval and time.perf_counter() - last_reset >= self.reset_interval:
+                self.api.post_reset_collection()
+                last_reset = time.perf_counter()
+            summary = self._runner.run()
+            latency = summary.get("service_time", summary["latency"])
+            window = {"index": len(self.windows),
+                      "time": time.perf_counter() - started,
+                      "requests": summary["requests"],
+                      "rps": summary["rps"],
+                      "error_rate": summary["error_rate"],
+                      "latency_p50": latency.get("p50"),
+                      "latency_p90": latency.get("p90"),
+                      "latency_p99": latency.get("p99"),
+                      "rss": rss_bytes()}
+            self.windows.append(window)
+            if report:
+                report(f"[window {window['index']:4d} {window['time']:9.1f}s] requests={window['requests']} "
+                       f"rps={window['rps']:.1f} errors={window['error_rate']:.1%} "
+                       f"p50={(window['latency_p50'] or 0) * 1000:.1f}ms "
+                       f"p99={(window['latency_p99'] or 0) * 1000:.1f}ms "
+                       f"rss={window['rss'] / 2 ** 20:.1f}MiB")
+        return self.windows
+
+    def drift(self, warmup_windows: int = 1, alpha: float = 0.01, min_change: float = 0.1) -> list:
+        """
+        Проверить показатели на дрейф; первые warmup_windows окон (прогрев: соединения, кеши, аллокации) не учитываются
+        """
+        windows = self.windows[warmup_windows:]
+        return [detect_drift(windows, metric, alpha, min_change) for metric in DRIFT_METRICS]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m framework.soak",
+                                     description="Soak test of the characters API with latency and memory drift "
+                                                 "detection")
+    parser.add_argument("--mix", default="get_character_by_name=70,get_all_characters=20,put_character=10",
+                        help="Comma separated operation=weight pairs (see python -m framework.load --help)")
+    parser.add_argument("--workers", type=int, default=10, help="Number of concurrent workers")
+    parser.add_argument("--rate", type=float, help="Open-loop mode: constant request rate (requests per second)")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Duration of the run in seconds")
+    parser.add_argument("--window", type=float, default=60.0, help="Sampling window in seconds")
+    parser.add_argument("--reset-interval", type=float, default=600.0,
+                        help="Reset the collection every N seconds (0 - never)")
+    parser.add_argument("--warmup-windows", type=int, default=1, help="Windows excluded from drift detection")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level of drift detection")
+    parser.add_argument("--min-change", type=float, default=0.1,
+                        help="Min relative growth over the run to report drift (0.1 = 10%%)")
+    parser.add_argument("--summary", default="soak_summary.json", help="Path of the summary file")
+    parser.add_argument("--seed", type=int, help="Random seed of the workers")
+    parser.add_argument("--service-address", help="Address of the service (default is the remote test service)")
+    parser.add_argument("--local-service", action="store_true", help="Run against in-process stand-in of the service")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    service = None
+    if args.local_service:
+        # Локальная замена сервиса (http.server) загружается только с опцией --local-service
+        from framework.local_service import LocalService
+        service = LocalService(auth_header=Credentials().basic_auth_header()).start()
+    try:
+        with API(pool_size=args.workers, service_address=service.address if service else args.service_address) \
+                as api:
+            content = api.get_all_characters().content
+            names = [record["name"] for record in content.get("result", [])] if isinstance(content, dict) else None
+            runner = SoakRunner(api, parse_mix(args.mix), workers=args.workers, duration=args.duration,
+                                window=args.window, reset_interval=args.reset_interval, rate=args.rate, names=names,
+                                seed=args.seed)
+            windows = runner.run(report=print)
+            drift = runner.drift(args.warmup_windows, args.alpha, args.min_change)
+    finally:
+        if service:
+            service.stop()
+    summary = {"config": vars(args), "windows": windows, "drift": [asdict(result) for result in drift]}
+    with open(args.summary, "w", encoding="utf-8") as file:
+        json.dump(summary, file, indent=2)
+    for result in drift:
+        print(f"{result.metric}: {'DRIFT' if result.drift else 'ok'} "
+              f"(change {result.relative_change:+.1%} over the run, {result.slope_per_hour:+.6g} per hour, "
+              f"p-value {result.p_value:.3g}, {result.windows} windows)")
+    print(f"Summary is written to '{args.summary}'")
+    return 1 if any(result.drift for result in drift) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
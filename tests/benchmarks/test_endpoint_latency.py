@@ -0,0 +1,63 @@
+import allure
+import pytest
+
+from framework.benchmark import run_benchmark
+from framework.helpers.checker import Checker as check
+
+
+@allure.feature("BENCHMARK")
+@allure.story("LATENCY")
+@pytest.mark.benchmark
+class TestEndpointLatency:
+    """
+    Замеры распределения задержек для каждого метода API. Запуск: pytest tests/benchmarks --benchmark
+    """
+
+    @allure.description("Benchmark for 'GET /characters' method. Record latency percentiles and throughput")
+    def test_get_all_characters(self, api, benchmark_options, benchmark_results):
+        result = run_benchmark("GET /characters", lambda index: api.get_all_characters(), **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
+
+    @allure.description("Benchmark for 'GET /character?name=...' method. Record latency percentiles and throughput")
+    def test_get_character_by_name(self, api, benchmark_options, benchmark_results):
+        result = run_benchmark("GET /character", lambda index: api.get_character_by_name("Dracula"),
+                               **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
+
+    @allure.description("Benchmark for 'POST /character' method. Each new character is deleted after the request "
+                        "(deletion is not measured)")
+    def test_post_character(self, api, test_data, benchmark_options, benchmark_results):
+        factory = test_data.factory("BENCH_POST", size=benchmark_options["warmup"] + benchmark_options["iterations"])
+        result = run_benchmark("POST /character", lambda index: api.post_character(factory(index)),
+                               after=lambda index: api.delete_character_by_name(factory(index)["name"]),
+                               **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
+
+    @allure.description("Benchmark for 'PUT /character' method")
+    def test_put_character(self, api, benchmark_options, benchmark_results):
+        result = run_benchmark("PUT /character",
+                               lambda index: api.put_character({"name": "Dracula", "other_aliases": f"BENCH {index}"}),
+                               **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
+
+    @allure.description("Benchmark for 'DELETE /character?name=...' method. Each deleted character is added "
+                        "before the request (adding is not measured)")
+    def test_delete_character_by_name(self, api, test_data, benchmark_options, benchmark_results):
+        factory = test_data.factory("BENCH_DELETE",
+                                    size=benchmark_options["warmup"] + benchmark_options["iterations"])
+        result = run_benchmark("DELETE /character",
+                               lambda index: api.delete_character_by_name(factory(index)["name"]),
+                               before=lambda index: api.post_character(factory(index)),
+                               **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
+
+    @allure.description("Benchmark for 'POST /reset' method")
+    def test_post_reset_collection(self, api, benchmark_options, benchmark_results):
+        result = run_benchmark("POST /reset", lambda index: api.post_reset_collection(), **benchmark_options)
+        benchmark_results.append(result)
+        check.matching_data(dict(result.status_codes), {200: result.iterations})
@@ -1,22 +1,358 @@
+import glob
+import inspect
+import json
+import os
+import random
+from contextlib import nullcontext
+
 import allure
 import pytest
-from faker import Faker
 
 from framework.api import API
+from framework.helpers import reporting
+from framework.helpers.cassette import MATCH_FIELDS, MODES as CASSETTE_MODES, REPLAY, Cassette, read_metadata
+from framework.helpers.credentials import Credentials
+from framework.helpers.data_factory import FIXED_NAMES, DataFactory
+from framework.helpers.state_scheduler import StateScheduler, scope_of
+from framework.helpers.workers import CollectionLock, is_worker, worker_id
+
+
+def pytest_addoption(parser):
+    parser.addoption("--local-service", action="store_true", default=bool(os.getenv("TEST_LOCAL_SERVICE")),
+                     help="Run tests against in-process stand-in of the service (or set TEST_LOCAL_SERVICE=1)")
+    parser.addoption("--report-mode", action="store", choices=reporting.MODES, default=reporting.get_mode(),
+                     help="Allure steps of framework helpers: 'detailed' (every step) or 'lean' (only failed steps)")
+    parser.addoption("--benchmark", action="store_true", default=False,
+                     help="Run benchmark tests (marked with 'benchmark'), they are skipped by default")
+    parser.addoption("--benchmark-iterations", action="store", type=int, default=100,
+                     help="Number of measured requests per benchmark")
+    parser.addoption("--benchmark-warmup", action="store", type=int, default=10,
+                     help="Number of warmup requests per benchmark (not measured)")
+    parser.addoption("--benchmark-dir", action="store", default="benchmark_results",
+                     help="Directory for benchmark results files")
+    parser.addoption("--response-cache", action="store_true", default=bool(os.getenv("TEST_RESPONSE_CACHE")),
+                     help="Cache responses of GET requests until the next write request (or set TEST_RESPONSE_CACHE=1)")
+    parser.addoption("--cache-ttl", action="store", type=float, default=60.0,
+                     help="Time to live of cached responses in seconds")
+    parser.addoption("--cache-size", action="store", type=int, default=128,
+                     help="Max number of cached responses")
+    parser.addoption("--cassette", action="store", default=os.getenv("TEST_CASSETTE"),
+                     help="Cassette file: record requests and responses to it or replay responses from it "
+                          "(or set TEST_CASSETTE=<path>)")
+    parser.addoption("--cassette-mode", action="store", choices=CASSETTE_MODES, default="replay",
+                     help="'record' (requests go to the service and are saved) or 'replay' (no network)")
+    parser.addoption("--cassette-match", action="store", default=",".join(MATCH_FIELDS),
+                     help=f"Comma separated request fields to match recorded responses on: {', '.join(MATCH_FIELDS)}")
+    parser.addoption("--data-seed", action="store", type=int, default=os.getenv("TEST_DATA_SEED"),
+                     help="Seed of generated test data (names and payloads are reproducible for the same seed). "
+                          "Random by default (on cassette replay - the recorded seed), "
+                          "the seed is shown in the terminal summary")
+    parser.addoption("--retries", action="store", type=int, default=int(os.getenv("TEST_RETRIES", "0")),
+                     help="Retry a request up to N times on connection errors and 429/502/503/504 responses "
+                          "(or set TEST_RETRIES=N)")
+    parser.addoption("--retry-backoff", action="store", type=float, default=0.2,
+                     help="Delay before the first retry in seconds (doubled for every next retry, with jitter)")
+    parser.addoption("--retry-post", action="store_true", default=False,
+                     help="Retry POST requests too (not idempotent: a retried POST may add a record twice)")
+    parser.addoption("--metrics", action="store", default=os.getenv("TEST_METRICS"),
+                     help="Write metrics of API requests in OpenMetrics text format to this file at the end of session "
+                          "(or set TEST_METRICS=<path>)")
+    parser.addoption("--metrics-port", action="store", type=int, default=None,
+                     help="Serve metrics of API requests on this local port during the session (0 - any free port)")
+    parser.addoption("--pool-size", action="store", type=int, default=10,
+                     help="Size of the keep-alive connection pool of the API object")
+    parser.addoption("--concurrency", action="store", type=int, default=10,
+                     help="Max number of simultaneous requests of the AsyncAPI object")
+    parser.addoption("--reset-policy", action="store", choices=("dirty", "always"),
+                     default=os.getenv("TEST_RESET_POLICY", "dirty"),
+                     help="'dirty' (reset the collection only if it was changed, read-only test classes run first) "
+                          "or 'always' (reset before every test class in collection order)")
+
+
+def pytest_configure(config):
+    reporting.set_mode(config.getoption("--report-mode"))
+    config.option.data_seed = data_seed(config)
+    config.addinivalue_line("markers", "benchmark: latency benchmark, runs only with '--benchmark'")
+    config.addinivalue_line("markers", "strict_cache: test measures server latency, response cache is bypassed")
+    config.addinivalue_line("markers", "batch(table): cases of RequestBatch table, requests are sent concurrently")
+    config.addinivalue_line("markers", "whole_collection: test checks or resets the whole collection "
+                                       "(runs alone on the shared collection of the remote service)")
+    # Порядок тестов не меняется при работе с кассетой: запросы должны идти в том же порядке, что и при записи
+    reorder = config.getoption("--reset-policy") == "dirty" and not config.getoption("--cassette")
+    config.pluginmanager.register(StateScheduler(config, reorder=reorder), "state_scheduler")
+
+
+def cassette_path(path) -> str:
+    # Под pytest-xdist у каждого воркера свой файл кассеты
+    if is_worker():
+        root, ext = os.path.splitext(path)
+        return f"{root}.{worker_id()}{ext}"
+    return path
+
+
+def data_seed(config) -> int:
+    """
+    Зерно тестовых данных: записанное в кассете (при воспроизведении имена в запросах должны совпасть с записанными),
+    заданное опцией, выбранное основным процессом pytest-xdist (передается воркерам через workerinput) или случайное
+    """
+    seed = config.getoption("--data-seed")
+    path = config.getoption("--cassette")
+    if path and config.getoption("--cassette-mode") == REPLAY:
+        # Основной процесс pytest-xdist читает зерно из кассеты любого воркера
+        paths = [cassette_path(path)] + sorted(glob.glob("{}.gw*{}".format(*os.path.splitext(path))))
+        recorded = next((metadata["data_seed"] for metadata in map(read_metadata, paths) if "data_seed" in metadata),
+                        None)
+        if recorded is not None:
+            if seed is not None and seed != recorded:
+                raise pytest.UsageError(f"Cassette '{path}' was recorded with '--data-seed {recorded}', got {seed}")
+            return recorded
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None and "data_seed" in workerinput:
+        return workerinput["data_seed"]
+    return seed if seed is not None else random.randrange(2 ** 32)
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="Benchmarks run only with '--benchmark'")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """
+    Run 'async def' tests in own event loop, so they can await AsyncAPI requests (async_api fixture).
+    Inside them coroutines are awaited directly: async_api.run() can't be called from a running loop
+    """
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    import asyncio
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    seed = config.getoption("--data-seed")
+    terminalreporter.write_line(f"Test data seed: {seed} (reproduce names and payloads with '--data-seed {seed}')")
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["data_seed"] = node.config.getoption("--data-seed")
+    node.workerinput["scopes_together"] = scopes_together(node.config)
+
+
+def default_distribution(config) -> bool:
+    # Опции до обработки pytest-xdist: с '-n' без '--dist' он сам выставляет dist = 'load'
+    explicit = config.known_args_namespace
+    return explicit.dist == "no" and not explicit.distload and getattr(config.option, "dist", "no") == "load"
+
+
+def scopes_together(config) -> bool:
+    """
+    Все тесты одного класса (модуля) выполняются в одном процессе:
+    без pytest-xdist, с распределением по умолчанию или '--dist loadscope'/'--dist loadfile'
+    """
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        return workerinput.get("scopes_together", False)
+    dist = getattr(config.option, "dist", "no")
+    return dist in ("no", "loadscope", "loadfile") or default_distribution(config)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    """
+    Default xdist distribution ('-n' without '--dist') sends whole test classes to one worker:
+    tests of a class share the collection state prepared by the class-scoped reset.
+    Distribution set explicitly ('--dist ...' or '-d') is not changed
+    """
+    if default_distribution(config):
+        from xdist.scheduler import LoadScopeScheduling
+        return LoadScopeScheduling(config, log)
+    return None
+
+
+@pytest.fixture(scope="session")
+def service_address(request):
+    """
+    Start local stand-in of the service on a free port if '--local-service' is set.
+    Under pytest-xdist session fixtures run in every worker, so each worker gets its own service and collection
+
+    :return: service address or None (use the remote service)
+    """
+    if not request.config.getoption("--local-service"):
+        yield None
+        return
+    from framework.local_service import LocalService
+    with allure.step("Start local service"):
+        service = LocalService(auth_header=Credentials().basic_auth_header()).start()
+    yield service.address
+    with allure.step("Stop local service"):
+        service.stop()
+
+
+@pytest.fixture(scope="session")
+def response_cache(request):
+    """
+    Create cache for GET responses if '--response-cache' is set
+
+    :return: ResponseCache object or None
+    """
+    if not request.config.getoption("--response-cache"):
+        return None
+    from framework.helpers.cache import ResponseCache
+    return ResponseCache(ttl=request.config.getoption("--cache-ttl"), max_size=request.config.getoption("--cache-size"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def metrics_registry(request):
+    """
+    Collect metrics of API requests if '--metrics' or '--metrics-port' is set
+    (under pytest-xdist every worker writes own metrics file)
+
+    :return: MetricsRegistry object or None
+    """
+    path, port = request.config.getoption("--metrics"), request.config.getoption("--metrics-port")
+    if not path and port is None:
+        yield None
+        return
+    from framework.metrics import MetricsRegistry, set_registry
+    registry = MetricsRegistry()
+    set_registry(registry)
+    server = None
+    if port is not None:
+        server = registry.serve(port)
+        with allure.step(f"Serve metrics on {server.address}"):
+            pass
+    yield registry
+    set_registry(None)
+    if server is not None:
+        server.stop()
+    if path:
+        if is_worker():
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{worker_id()}{ext}"
+        registry.write(path)
+        allure.attach.file(path, name="Metrics", attachment_type=allure.attachment_type.TEXT)
+
+
+@pytest.fixture(scope="session")
+def cassette(request):
+    """
+    Create cassette if '--cassette' is set (under pytest-xdist every worker has own cassette file).
+    Recorded cassette is saved at the end of the session
+
+    :return: Cassette object or None
+    """
+    path = request.config.getoption("--cassette")
+    if not path:
+        yield None
+        return
+    path = cassette_path(path)
+    match_on = [field.strip() for field in request.config.getoption("--cassette-match").split(",") if field.strip()]
+    with allure.step(f"Create cassette '{path}'"):
+        cassette = Cassette(path, mode=request.config.getoption("--cassette-mode"), match_on=match_on,
+                            metadata={"data_seed": request.config.getoption("--data-seed")})
+    yield cassette
+    if not cassette.is_replay:
+        cassette.save()
+        allure.attach.file(path, name="Cassette", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(scope="session")
+def retry_policy(request):
+    """
+    Create retry policy if '--retries' is set. Retries are reported as allure steps and attached at the end of session
+
+    :return: RetryPolicy object or None
+    """
+    retries = request.config.getoption("--retries")
+    if retries <= 0:
+        yield None
+        return
+    from framework.helpers.retry import RetryPolicy
+    policy = RetryPolicy(attempts=retries + 1, backoff=request.config.getoption("--retry-backoff"),
+                         retry_post=request.config.getoption("--retry-post"))
+    yield policy
+    if policy.history:
+        allure.attach(json.dumps({**policy.stats(), "history": [retry.to_dict() for retry in policy.history]},
+                                 indent=1),
+                      name="Request retries", attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(scope="session")
+def collection_state(request):
+    """
+    Changes of the collection made by API objects of the session
+
+    :return: CollectionState object
+    """
+    return request.config.pluginmanager.get_plugin("state_scheduler").state
 
 
 @pytest.fixture(scope="session")
-def api():
+def api(request, service_address, response_cache, cassette, retry_policy, collection_state):
     """
-    Create API object
+    Create API object with pooled keep-alive transport
 
     :return: API object
     """
     with allure.step("Create API object"):
-        api = API()
+        api = API(pool_size=request.config.getoption("--pool-size"), service_address=service_address,
+                  cache=response_cache, cassette=cassette, retry=retry_policy, state=collection_state)
     yield api
-    with allure.step("Delete API object"):
-        del api
+    with allure.step(f"Close API object (connection stats: {api.connection_stats()}, cache: {api.cache}, "
+                     f"retries: {api.retry})"):
+        api.close()
+
+
+@pytest.fixture(scope="session")
+def async_api(request, service_address, response_cache, cassette, retry_policy, collection_state):
+    """
+    Create AsyncAPI object (concurrent requests bounded by '--concurrency')
+
+    :return: AsyncAPI object
+    """
+    from framework.async_api import AsyncAPI
+    with allure.step("Create AsyncAPI object"):
+        async_api = AsyncAPI(concurrency=request.config.getoption("--concurrency"),
+                             service_address=service_address, cache=response_cache, cassette=cassette,
+                             retry=retry_policy, state=collection_state)
+    yield async_api
+    with allure.step("Close AsyncAPI object"):
+        async_api.close()
+
+
+@pytest.fixture(scope="session")
+def benchmark_options(request):
+    """
+    Benchmark settings from command line options
+
+    :return: dict with 'iterations' and 'warmup'
+    """
+    return {"iterations": request.config.getoption("--benchmark-iterations"),
+            "warmup": request.config.getoption("--benchmark-warmup")}
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(request, service_address):
+    """
+    Collect benchmark results and write them to a file at the end of the session
+
+    :return: list for BenchmarkResult objects
+    """
+    results = []
+    yield results
+    if results:
+        from framework.benchmark import write_results
+        path = write_results(results, request.config.getoption("--benchmark-dir"),
+                             metadata={"service_address": service_address or API._service_address})
+        allure.attach.file(path, name="Benchmark results", attachment_type=allure.attachment_type.JSON)
 
 
 @pytest.fixture(scope="session")
@@ -26,6 +362,8 @@ def fake():
 
     :return: Faker object
     """
+    # Faker загружает десятки модулей провайдеров, поэтому импортируется только при первом использовании
+    from faker import Faker
     with allure.step("Create Faker object"):
         fake = Faker()
     yield fake
@@ -33,9 +371,143 @@ def fake():
         del fake
 
 
+@pytest.fixture(scope="session")
+def test_data(request, shared_collection):
+    """
+    Create test data factory (names of every pytest-xdist worker come from own range,
+    with the shared collection every worker also uses own copies of fixed characters)
+
+    :return: DataFactory object
+    """
+    seed = request.config.getoption("--data-seed")
+    with allure.step(f"Create test data factory (seed = {seed})"):
+        return DataFactory.for_worker(seed=seed, namespace=worker_id() if shared_collection else None)
+
+
+@pytest.fixture
+def batched_response(request, async_api, test_data):
+    """
+    Response to the request of the current case of RequestBatch table (marker 'batch').
+    Requests of the selected cases of the table from the same class (module) are sent concurrently
+    when the first case runs. When pytest-xdist may split the class between workers ('--dist load' etc.)
+    every case sends own request: other cases may run on other workers
+
+    :return: SimpleResponse object
+    """
+    batch = request.node.get_closest_marker("batch").args[0]
+    if scopes_together(request.config):
+        scope = scope_of(request.node)
+        selected = [item.callspec.params for item in request.session.items
+                    if scope_of(item) == scope and item.get_closest_marker("batch") is not None
+                    and item.get_closest_marker("batch").args[0] is batch]
+    else:
+        selected = [request.node.callspec.params]
+    return batch.response(async_api, test_data, request.node.callspec.params, selected)
+
+
+@pytest.fixture
+def seed(api):
+    """
+    Fill the collection with seed_characters(api, n, **kwargs), seeded characters are deleted on teardown
+
+    :return: function seed(n, **kwargs) -> SeedSummary
+    """
+    from framework.seeding import cleanup_characters, seed_characters
+    summaries = []
+
+    def seed(n, **kwargs):
+        summary = seed_characters(api, n, **kwargs)
+        summaries.append(summary)
+        return summary
+    yield seed
+    for summary in summaries:
+        cleanup_characters(api, summary)
+
+
+@pytest.fixture(autouse=True)
+def strict_cache(request, api):
+    """
+    Bypass response cache for tests marked with 'strict_cache' or 'benchmark'
+    """
+    if api.cache is None or not ({"strict_cache", "benchmark"} & set(request.keywords)):
+        yield
+        return
+    with api.cache.strict():
+        yield
+
+
+@pytest.fixture(scope="session")
+def shared_collection(service_address):
+    """
+    Collection of the remote service is shared by pytest-xdist workers
+    (workers with local services have own collections)
+
+    :return: bool
+    """
+    return service_address is None and is_worker()
+
+
+@pytest.fixture(scope="session")
+def collection_lock(shared_collection, tmp_path_factory):
+    """
+    Lock of the shared collection of the remote service for pytest-xdist workers (held during the reset)
+
+    :return: CollectionLock object or None
+    """
+    if not shared_collection:
+        return None
+    return CollectionLock(tmp_path_factory.getbasetemp().parent / "collection.lock")
+
+
+def copy_fixed_characters(api, test_data, collection_state):
+    # Копии фиксированных записей воркера считаются частью исходного состояния коллекции
+    if test_data.namespace is not None:
+        from framework.seeding import copy_characters
+        with collection_state.baseline():
+            copy_characters(api, FIXED_NAMES, test_data.fixed_name)
+
+
 @pytest.fixture(autouse=True, scope="class")
-def reset_collection(api):
-    with allure.step("Reset the collection"):
-        api.post_reset_collection()
-    yield  # специально остаил такую конструкцию, чтобы явно разделить setup и teardown
-    ...
+def reset_collection(request, api, collection_lock, collection_state, test_data):
+    # Тесты воркера меняют в общей коллекции только свои копии фиксированных записей и записи со своими именами,
+    # поэтому воркер сбрасывает коллекцию, только если изменил ее сам. Сброс ждет, пока другие воркеры закончат
+    # свои классы тестов (класс держит разделяемую блокировку до конца)
+    if collection_state.dirty or request.config.getoption("--reset-policy") == "always":
+        with collection_lock.exclusive() if collection_lock is not None else nullcontext(), \
+                allure.step("Reset the collection"):
+            api.post_reset_collection()
+    else:
+        collection_state.skip_reset()
+        with allure.step("Skip reset of the collection (not changed since the last reset)"):
+            pass
+    with collection_lock.shared() if collection_lock is not None else nullcontext():
+        # Копии могли пропасть при сбросе коллекции другим воркером
+        copy_fixed_characters(api, test_data, collection_state)
+        yield  # специально остаил такую конструкцию, чтобы явно разделить setup и teardown
+        ...
+
+
+@pytest.fixture(autouse=True)
+def whole_collection(request, api, collection_lock, collection_state, test_data):
+    """
+    Run test marked 'whole_collection' alone on the shared collection: under exclusive lock, on the reset collection
+    and with the fixed characters themselves (not copies of the worker). The collection is reset after the test,
+    because other workers expect the fixed characters unchanged
+
+    :return: None
+    """
+    if collection_lock is None or request.node.get_closest_marker("whole_collection") is None:
+        yield
+        return
+    namespace = test_data.namespace
+    with collection_lock.exclusive():
+        with allure.step("Reset the collection before the test of the whole collection"):
+            api.post_reset_collection()
+        test_data.namespace = None
+        try:
+            yield
+        finally:
+            test_data.namespace = namespace
+            with allure.step("Reset the collection after the test of the whole collection"):
+                api.post_reset_collection()
+    copy_fixed_characters(api, test_data, collection_state)
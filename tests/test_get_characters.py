@@ -1,10 +1,14 @@
 import allure
+import pytest
 
 from framework.helpers.checker import Checker as check
+from framework.helpers.collection import CharacterCollection
 
 
 @allure.feature("GET")
 @allure.story("CHARACTERS")
+@pytest.mark.readonly
+@pytest.mark.whole_collection
 class TestGetCharacters:
 
     @allure.title("Check correct response without params")
@@ -12,50 +16,30 @@ class TestGetCharacters:
                         "Check response structure, data types and response time")
     def test_response_without_params(self, api):
         response = api.get_all_characters()
-        expected_schema = {
-            "result": {
-                "type": "list",
-                "schema": {
-                    "type": "dict",
-                    "schema": {
-                        "education": {"type": "string"},
-                        "height": {"type": "number"},
-                        "weight": {"type": "number"},
-                        "identity": {"type": "string"},
-                        "name": {"type": "string"},
-                        "other_aliases": {"type": "string"},
-                        "universe": {"type": "string"}
-                    }
-                }
-            }
-        }
-        check.base_complex_check(response, 200, schema=expected_schema)
+        check.base_complex_check(response, 200, schema="character_list")
 
     @allure.title("Check correct response with params")
     @allure.description("Test for 'GET /characters' method. Expected status code 200. "
                         "Check response structure, data types and response time. "
                         "Response should not be affected by request with params ")
     def test_response_with_params(self, api):
-        expected_schema = {
-            "result": {
-                "type": "list",
-                "schema": {
-                    "type": "dict",
-                    "schema": {
-                        "education": {"type": "string"},
-                        "height": {"type": "number"},
-                        "weight": {"type": "number"},
-                        "identity": {"type": "string"},
-                        "name": {"type": "string"},
-                        "other_aliases": {"type": "string"},
-                        "universe": {"type": "string"}
-                    }
-                }
-            }
-        }
         response = api.get_all_characters()
         check.base_complex_check(response, 200)
         response_with_params = api.get_all_characters(params={"name": "Dracula"})
-        check.base_complex_check(response_with_params, 200, schema=expected_schema)
+        check.base_complex_check(response_with_params, 200, schema="character_list")
         check.matching_data(response_with_params.content, response.content)
         check.matching_data(response_with_params.headers, response.headers)
+
+    @allure.title("Check streamed response")
+    @allure.description("Test for 'GET /characters' method with streamed parsing of response. "
+                        "Every record is validated and indexed on arrival. "
+                        "Streamed records must be equal to records of the usual response")
+    def test_streamed_response(self, api):
+        response = api.get_all_characters()
+        check.base_complex_check(response, 200, schema="character_list")
+        collection = CharacterCollection()
+        with api.stream_all_characters(on_record=[check.record_schema, collection.apply_post]) as streamed_response:
+            check.status_code(streamed_response.status_code, 200)
+            records = list(streamed_response)
+        check.matching_data(records, response.content["result"])
+        check.matching_data(collection.records(), response.content["result"])
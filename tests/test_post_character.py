@@ -1,10 +1,26 @@
 import allure
 import pytest
 
+from framework.batch import RequestBatch
 from framework.helpers.checker import Checker as check
+from framework.helpers.data_factory import invalid_cases
 from framework.helpers.utils import transform_to_float, update_dictionary_single_val, change_field_name, pop_field
 
 
+def post_bad_str_fields(api, test_data, bad_field_names, bad_value):
+    character_data = test_data.character()
+    update_dictionary_single_val(character_data, bad_field_names, bad_value)
+    if ("name" in bad_field_names) and (bad_value == "!?;:/|@#$%^&*_-+=~<>±§"):
+        update_dictionary_single_val(character_data, ["name", ], test_data.name(character_data['name']))
+    return api.post_character(character_data)
+
+
+def post_bad_numeric_fields(api, test_data, bad_field_names, bad_value):
+    character_data = test_data.character()
+    update_dictionary_single_val(character_data, bad_field_names, bad_value)
+    return api.post_character(character_data)
+
+
 @allure.feature("POST")
 @allure.story("CHARACTER")
 class TestPostCharacter:
@@ -22,22 +38,8 @@ class TestPostCharacter:
         ("Тест Имя", "ТестВселенная", "Тест Образование", "-11.11", "22", "ТестИзвестность",
          "Тест Прозвище1, Тест Прозвище2")
     ])
-    def test_correct_data(self, api, fake, name, universe, education, weight, height, identity, other_aliases):
-        schema = {
-            "result": {
-                "type": "dict",
-                "schema": {
-                    "education": {"type": "string"},
-                    "height": {"type": "number"},
-                    "weight": {"type": "number"},
-                    "identity": {"type": "string"},
-                    "name": {"type": "string"},
-                    "other_aliases": {"type": "string"},
-                    "universe": {"type": "string"}
-                }
-            }
-        }
-        character_data = {"name": name + str(fake.random_number()),
+    def test_correct_data(self, api, test_data, name, universe, education, weight, height, identity, other_aliases):
+        character_data = {"name": test_data.name(name),
                           "universe": universe,
                           "education": education,
                           "weight": weight,
@@ -46,7 +48,7 @@ class TestPostCharacter:
                           "other_aliases": other_aliases}
         allure.dynamic.title(f"Add character: {character_data}")
         response = api.post_character(character_data)
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
         character_data.update({"weight": transform_to_float(character_data["weight"]),
                                "height": transform_to_float(character_data["height"])})
         check.matching_data(api.get_character_by_name(character_data.get('name')).content.get('result'), character_data)
@@ -54,18 +56,18 @@ class TestPostCharacter:
     @allure.title("Add character only with 'name' field")
     @allure.description("Check POST CHARACTER with json which contain only 'name' field. "
                         "Expected status code 400 and error message")
-    def test_empty_data_with_name(self, api, fake):
-        character_data = {"name": "TestName" + str(fake.random_number())}
+    def test_empty_data_with_name(self, api, test_data):
+        character_data = {"name": test_data.name()}
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.title("Add character with empty json")
     @allure.description("Check POST CHARACTER with json which contain nothing. "
                         "Expected status code 400 and error message")
-    def test_empty_data_with_name(self, api, fake):
+    def test_empty_data_with_name(self, api):
         character_data = {}
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.description("Test for 'POST /character' method with empty input field in json. "
                         "Check response structure, data types and response time."
@@ -76,18 +78,12 @@ class TestPostCharacter:
         ("other_aliases",),
         ("name", "universe", "education"),
         ("weight", "height", "identity")])
-    def test_empty_field(self, api, fake, empty_field_names):
+    def test_empty_field(self, api, test_data, empty_field_names):
         allure.dynamic.title(f"Check add character with empty fields: {empty_field_names}")
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
+        character_data = test_data.character()
         update_dictionary_single_val(character_data, empty_field_names, "")
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
         for field_name in empty_field_names:
             check.data_contain_str(response.content["error"], field_name)
 
@@ -100,83 +96,66 @@ class TestPostCharacter:
         ("other_aliases",),
         ("name", "universe", "education"),
         ("weight", "height", "identity")])
-    def test_null_field(self, api, fake, null_field_names):
+    def test_null_field(self, api, test_data, null_field_names):
         allure.dynamic.title(f"Check add character with null field: {null_field_names}")
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
+        character_data = test_data.character()
         update_dictionary_single_val(character_data, null_field_names, None)
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
         for field_name in null_field_names:
             check.data_contain_str(response.content["error"], field_name)
 
+    @allure.description("Test for 'POST /character' method with invalid value of one field "
+                        "(invalid values of test data factory). "
+                        "Expected status code 400 and error message with the field name. "
+                        "New character will not be added to collection")
+    @pytest.mark.parametrize("field_name, kind", invalid_cases())
+    def test_invalid_field_value(self, api, test_data, field_name, kind):
+        allure.dynamic.title(f"Check add character with '{kind}' value of field: {field_name}")
+        response = api.post_character(test_data.invalid_character(field_name, kind))
+        check.base_complex_check(response, 400, schema="error")
+        check.data_contain_str(response.content["error"], field_name)
+
     @allure.description("Test for 'POST /character' method with bad input json (string fields)"
                         "Check response structure, data types and response time."
                         "Expected status code 400.  Error message will not be checked. "
                         "New character will not be added to collection")
-    @pytest.mark.parametrize("bad_field_names", [
+    @RequestBatch.nested("bad_field_names, bad_value", [[
         ("name",),
         ("other_aliases",),
         ("name", "universe"),
         ("education", "identity")
-    ])
-    @pytest.mark.parametrize("bad_value", [
+    ], [
         'A' * (2 ** 10),
         123,
         -10,
         "!?;:/|@#$%^&*_-+=~<>±§"  # сомнительный кейс
-    ])
-    def test_bad_field_str(self, api, fake, bad_field_names, bad_value):
+    ]], request=post_bad_str_fields)
+    def test_bad_field_str(self, batched_response, bad_field_names, bad_value):
         allure.dynamic.title(f"Check add character with bad string fields {bad_field_names}, value: {bad_value}")
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
-        update_dictionary_single_val(character_data, bad_field_names, bad_value)
-        if ("name" in bad_field_names) and (bad_value == "!?;:/|@#$%^&*_-+=~<>±§"):
-            update_dictionary_single_val(character_data, ["name", ], f"{character_data['name']}{fake.random_number()}")
-        response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(batched_response, 400, schema="error")
         for field_name in bad_field_names:
-            check.data_contain_str(response.content["error"], field_name)
+            check.data_contain_str(batched_response.content["error"], field_name)
 
     @allure.description("Test for 'POST /character' method with bad input json (numeric fields)"
                         "Check response structure, data types and response time."
                         "Expected status code 400.  Error message will not be checked. "
                         "New character will not be added to collection")
-    @pytest.mark.parametrize("bad_field_names", [
+    @RequestBatch.nested("bad_field_names, bad_value", [[
         ("weight",),
         ("height",),
         ("weight", "height")
-    ])
-    @pytest.mark.parametrize("bad_value", [
+    ], [
         'A' * (2 ** 10),
         "!?;:/|@#$%^&*_-+=~<>±§",
         "1 2",
         "123.1a2b3"
-    ])
-    def test_bad_field_numeric(self, api, fake, bad_field_names, bad_value):
+    ]], request=post_bad_numeric_fields)
+    def test_bad_field_numeric(self, batched_response, bad_field_names, bad_value):
         allure.dynamic.title(f"Check add character with bad numeric fields {bad_field_names}, value: {bad_value}")
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
-        update_dictionary_single_val(character_data, bad_field_names, bad_value)
-        response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(batched_response, 400, schema="error")
         for field_name in bad_field_names:
-            check.data_contain_str(response.content["error"], field_name)
+            check.data_contain_str(batched_response.content["error"], field_name)
 
     @allure.description("Test for 'POST /character' method with 'wrong' field names. "
                         "Check response structure, data types and response time."
@@ -187,19 +166,13 @@ class TestPostCharacter:
         ["name", "education", "height"],
         ["universe", "weight", "identity"],
     ])
-    def test_wrong_fields_name(self, api, fake, field_names):
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
+    def test_wrong_fields_name(self, api, test_data, field_names):
+        character_data = test_data.character()
         allure.dynamic.title(f"Add character with wrong fields ({field_names}). Data: {character_data}")
         for field_name in field_names:
             change_field_name(character_data, field_name, f"wrong_{field_name}")
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.description("Test for 'POST /character' method without some fields. "
                         "Check response structure, data types and response time."
@@ -210,26 +183,20 @@ class TestPostCharacter:
         ["name", "education", "height"],
         ["universe", "weight", "identity"],
     ])
-    def test_pop_fields(self, api, fake, field_names):
-        character_data = {"name": "TestName" + str(fake.random_number()),
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
+    def test_pop_fields(self, api, test_data, field_names):
+        character_data = test_data.character()
         allure.dynamic.title(f"Add character without fields ({field_names}). Data: {character_data}")
         for field_name in field_names:
             pop_field(character_data, field_name)
         response = api.post_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.description("Test for 'POST /character' method for duplicated character"
                         "Check response structure, data types and response time."
                         "Expected status code 400.  Error message will not be checked. "
                         "Duplicated character will not be added to collection")
-    def test_duplicate_character(self, api, fake):
-        character_name = "TestName" + str(fake.random_number())
+    def test_duplicate_character(self, api, test_data):
+        character_name = test_data.name()
         character_data = {"name": character_name,
                           "universe": "TestUniverse",
                           "education": "TestEducation",
@@ -241,28 +208,19 @@ class TestPostCharacter:
         first_response = api.post_character(character_data)
         check.base_complex_check(first_response, 200)
         second_response = api.post_character(character_data)
-        check.base_complex_check(second_response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(second_response, 400, schema="error")
         check.data_contain_str(second_response.content["error"], character_name)
 
     @allure.description("Test for 'POST /character' method for too many characters (more than DB limit)"
                         "Check response structure, data types and response time."
                         "Expected status code 400.  Error message will not be checked. "
                         "Duplicated character will not be added to collection")
-    def test_characters_limit(self, api, fake):
+    @pytest.mark.whole_collection
+    def test_characters_limit(self, seed, test_data):
         limit = 500
         allure.dynamic.title(f"Check adding characters more than DB limit ({limit})")
-        for i in range(limit + 1):
-            character_data = {"name": f"POST_{i + 1}_TestName_{fake.random_number()}",
-                              "universe": "TestUniverse",
-                              "education": "TestEducation",
-                              "weight": 1,
-                              "height": 2,
-                              "identity": "TestIdentity",
-                              "other_aliases": "TestAliases"}
-            response = api.post_character(character_data)
-            try:
-                check.base_complex_check(response, 200)
-            except AssertionError:
-                check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
-                check.data_contain_str(response.content["error"], str(limit))
-                break
+        summary = seed(limit + 1, factory=test_data.factory("POST"))
+        check.no_errors(summary.errors)
+        if summary.limit_reached:
+            check.base_complex_check(summary.limit_response, 400, schema="error")
+            check.data_contain_str(summary.limit_response.content["error"], str(limit))
@@ -1,22 +1,26 @@
 import allure
+import pytest
 
 from framework.helpers.checker import Checker as check
+from framework.helpers.snapshot import CollectionSnapshot
 
 
 @allure.feature("POST")
 @allure.story("RESET")
+@pytest.mark.whole_collection
 class TestPostReset:
 
     @allure.title("Check reset collection with POST new character")
     @allure.description("Test for 'POST /reset' method. Check response structure, data types and response time."
                         "Pipeline: get collection -> modified collection (post) -> reset -> check collection")
-    def test_reset_collection_after_post(self, api, fake):
+    def test_reset_collection_after_post(self, api, test_data):
         # get collection
         old_collection_response = api.get_all_characters()
         check.base_complex_check(old_collection_response, 200)
+        old_snapshot = CollectionSnapshot.from_response(old_collection_response)
 
         # modified collection
-        character_data = {"name": "TestName" + str(fake.random_number()),
+        character_data = {"name": test_data.name(),
                           "universe": "TestUniverse",
                           "education": "TestEducation",
                           "weight": 1,
@@ -30,15 +34,16 @@ class TestPostReset:
         check.base_complex_check(reset_response, 200)
 
         # check
-        check.matching_data(api.get_all_characters().content, old_collection_response.content)
+        check.matching_snapshot(CollectionSnapshot.from_response(api.get_all_characters()), old_snapshot)
 
     @allure.title("Check reset collection with PUT character")
     @allure.description("Test for 'POST /reset' method. Check response structure, data types and response time."
                         "Pipeline: get collection -> modified collection (put) -> reset -> check collection")
-    def test_reset_collection_after_put(self, api, fake):
+    def test_reset_collection_after_put(self, api):
         # get collection
         old_collection_response = api.get_all_characters()
         check.base_complex_check(old_collection_response, 200)
+        old_snapshot = CollectionSnapshot.from_response(old_collection_response)
 
         # modified collection
         # возможно данный пайплайн надо будет доработать в заивисмости от частоты изменения данных в коллекции
@@ -56,15 +61,16 @@ class TestPostReset:
         check.base_complex_check(reset_response, 200)
 
         # check
-        check.matching_data(api.get_all_characters().content, old_collection_response.content)
+        check.matching_snapshot(CollectionSnapshot.from_response(api.get_all_characters()), old_snapshot)
 
     @allure.title("Check reset collection with DELETE character")
     @allure.description("Test for 'POST /reset' method. Check response structure, data types and response time."
                         "Pipeline: get collection -> modified collection (delete) -> reset -> check collection")
-    def test_reset_collection_after_delete(self, api, fake):
+    def test_reset_collection_after_delete(self, api):
         # get collection
         old_collection_response = api.get_all_characters()
         check.base_complex_check(old_collection_response, 200)
+        old_snapshot = CollectionSnapshot.from_response(old_collection_response)
 
         # modified collection
         character_name = "Dracula"
@@ -76,4 +82,4 @@ class TestPostReset:
         check.base_complex_check(reset_response, 200)
 
         # check
-        check.matching_data(api.get_all_characters().content, old_collection_response.content)
+        check.matching_snapshot(CollectionSnapshot.from_response(api.get_all_characters()), old_snapshot)
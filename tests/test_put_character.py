@@ -1,9 +1,39 @@
 import allure
 import pytest
 
+from framework.batch import RequestBatch
 from framework.helpers.checker import Checker as check
-from framework.helpers.utils import transform_to_float, pop_field, update_dictionary_single_val, \
-    get_first_duplicate_name, get_duplicated_records
+from framework.helpers.collection import CharacterCollection
+from framework.helpers.utils import transform_to_float, pop_field, update_dictionary_single_val
+
+
+async def put_own_character(api, test_data, field_names, value):
+    """
+    PUT с полями field_names (или всеми полями, кроме имени, - "all") = value для отдельной записи случая.
+    Запись создается перед запросом и удаляется после: случаи пакета выполняются одновременно
+    и не должны менять одну и ту же запись
+    """
+    character_data = test_data.character(prefix="PutTest")
+    response = await api.post_character(character_data)
+    check.status_code(response.status_code, 200)
+    try:
+        fields_list = [field for field in character_data if field != "name"] if field_names == "all" else field_names
+        update_dictionary_single_val(character_data, fields_list, value)
+        return await api.put_character(character_data)
+    finally:
+        await api.delete_character_by_name(character_data["name"])
+
+
+def put_null_fields(api, test_data, null_field_names):
+    return put_own_character(api, test_data, null_field_names, None)
+
+
+def put_empty_fields(api, test_data, empty_field_names):
+    return put_own_character(api, test_data, empty_field_names, "")
+
+
+def put_bad_fields(api, test_data, bad_field_names, bad_value):
+    return put_own_character(api, test_data, bad_field_names, bad_value)
 
 
 @allure.feature("PUT")
@@ -26,22 +56,9 @@ class TestPutCharacter:
         ("Dracula", "ТестВселенная", "Тест Образование", "-11.11", "22", "ТестИзвестность",
          "Тест Прозвище1, Тест Прозвище2")
     ])
-    def test_correct_data_full(self, api, name, universe, education, weight, height, identity, other_aliases):
-        schema = {
-            "result": {
-                "type": "dict",
-                "schema": {
-                    "education": {"type": "string"},
-                    "height": {"type": "number"},
-                    "weight": {"type": "number"},
-                    "identity": {"type": "string"},
-                    "name": {"type": "string"},
-                    "other_aliases": {"type": "string"},
-                    "universe": {"type": "string"}
-                }
-            }
-        }
-        character_data = {"name": name,
+    def test_correct_data_full(self, api, test_data, name, universe, education, weight, height, identity,
+                               other_aliases):
+        character_data = {"name": test_data.fixed_name(name),
                           "universe": universe,
                           "education": education,
                           "weight": weight,
@@ -50,10 +67,10 @@ class TestPutCharacter:
                           "other_aliases": other_aliases}
         allure.dynamic.title(f"Update character: {character_data}")
         response = api.put_character(character_data)
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
         character_data.update({"weight": transform_to_float(character_data["weight"]),
                                "height": transform_to_float(character_data["height"])})
-        curr_data = api.get_character_by_name(name).content.get("result")
+        curr_data = api.get_character_by_name(character_data["name"]).content.get("result")
         check.matching_data(curr_data, character_data)
 
     @allure.description("Test for 'PUT /character' method with correct data (partially). "
@@ -69,23 +86,9 @@ class TestPutCharacter:
         ["education", "weight", "other_aliases"],
         ["height", "identity", "universe"]
     ])
-    def test_correct_data_partially(self, api, field_names):
+    def test_correct_data_partially(self, api, test_data, field_names):
         allure.dynamic.title(f"Update character with fields: {field_names}")
-        schema = {
-            "result": {
-                "type": "dict",
-                "schema": {
-                    "education": {"type": "string"},
-                    "height": {"type": "number"},
-                    "weight": {"type": "number"},
-                    "identity": {"type": "string"},
-                    "name": {"type": "string"},
-                    "other_aliases": {"type": "string"},
-                    "universe": {"type": "string"}
-                }
-            }
-        }
-        name = "Dracula"
+        name = test_data.fixed_name("Dracula")
         character_data = {"universe": "TestUniverse",
                           "education": "TestEducation",
                           "weight": 1,
@@ -98,7 +101,7 @@ class TestPutCharacter:
         expected_data = api.get_character_by_name(name).content.get("result")
         expected_data.update(character_data)
         response = api.put_character({"name": name, **character_data})
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
         check.matching_data(api.get_character_by_name(name).content.get("result"), expected_data)
 
     @allure.title("Update character with empty data (without 'name')")
@@ -108,16 +111,16 @@ class TestPutCharacter:
     def test_empty_data_without_name(self, api):
         character_data = {}
         response = api.put_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
         check.data_contain_str(response.content["error"], "name")
 
     @allure.title("Update character with empty data (with 'name')")
     @allure.description("Check PUT CHARACTER with empty data (json contain only 'name' field)."
                         "Expected status code 400 and error message.")
-    def test_empty_data_with_name(self, api):
-        character_data = {"name": "Dracula"}
+    def test_empty_data_with_name(self, api, test_data):
+        character_data = {"name": test_data.fixed_name("Dracula")}
         response = api.put_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.description("Check PUT CHARACTER with nonexistent name. "
                         "Expected status code 400 and error message")
@@ -132,11 +135,11 @@ class TestPutCharacter:
                           "other_aliases": "TestAliases"
                           }
         response = api.put_character({"name": name, **character_data})
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+        check.base_complex_check(response, 400, schema="error")
 
     @allure.description("Check PUT CHARACTER method with some null fields. "
                         "Expect status code 400 and error message")
-    @pytest.mark.parametrize("null_field_names", [
+    @RequestBatch("null_field_names", [
         ["education", ],
         ["height", ],
         ["weight", ],
@@ -146,25 +149,14 @@ class TestPutCharacter:
         ["education", "weight", "other_aliases"],
         ["height", "identity", "universe"],
         "all"
-    ])
-    def test_null_fields(self, api, fake, null_field_names):
-        name = "Dracula"
-        allure.dynamic.title(f"Update character '{name}' with null fields {null_field_names}")
-        character_data = {"universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"
-                          }
-        fields_list = character_data.keys() if null_field_names == "all" else null_field_names
-        update_dictionary_single_val(character_data, fields_list, None)
-        response = api.put_character({"name": name, **character_data})
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+    ], request=put_null_fields)
+    def test_null_fields(self, batched_response, null_field_names):
+        allure.dynamic.title(f"Update character with null fields {null_field_names}")
+        check.base_complex_check(batched_response, 400, schema="error")
 
     @allure.description("Check PUT CHARACTER method with some empty fields. "
                         "Expect status code 400 and error message")
-    @pytest.mark.parametrize("empty_field_names", [
+    @RequestBatch("empty_field_names", [
         ["education", ],
         ["height", ],
         ["weight", ],
@@ -174,168 +166,96 @@ class TestPutCharacter:
         ["education", "weight", "other_aliases"],
         ["height", "identity", "universe"],
         "all"
-    ])
-    def test_empty_fields(self, api, fake, empty_field_names):
-        name = "Dracula"
-        allure.dynamic.title(f"Update character '{name}' with empty fields {empty_field_names}")
-        character_data = {"universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"
-                          }
-        fields_list = character_data.keys() if empty_field_names == "all" else empty_field_names
-        update_dictionary_single_val(character_data, fields_list, "")
-        response = api.put_character({"name": name, **character_data})
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+    ], request=put_empty_fields)
+    def test_empty_fields(self, batched_response, empty_field_names):
+        allure.dynamic.title(f"Update character with empty fields {empty_field_names}")
+        check.base_complex_check(batched_response, 400, schema="error")
 
     @allure.description("Check PUT CHARACTER when the number of characters has reached the limit. "
                         "Expected status code 200 and updated character")
-    def test_update_character_with_limit(self, api, fake):
+    @pytest.mark.whole_collection
+    def test_update_character_with_limit(self, api, seed, test_data):
         limit = 500
-        schema = {
-            "result": {
-                "type": "dict",
-                "schema": {
-                    "education": {"type": "string"},
-                    "height": {"type": "number"},
-                    "weight": {"type": "number"},
-                    "identity": {"type": "string"},
-                    "name": {"type": "string"},
-                    "other_aliases": {"type": "string"},
-                    "universe": {"type": "string"}
-                }
-            }
-        }
-        for i in range(limit + 1):
-            character_data = {"name": f"PUT_{i + 1}_TestName_{fake.random_number()}",
-                              "universe": "TestUniverse",
-                              "education": "TestEducation",
-                              "weight": 1,
-                              "height": 2,
-                              "identity": "TestIdentity",
-                              "other_aliases": "TestAliases"}
-            response = api.post_character(character_data)
-            try:
-                check.status_code(response.status_code, 200)
-            except AssertionError:
-                check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
-                check.data_contain_str(response.content["error"], str(limit))
-                break
-        upd_name = "Dracula"
+        summary = seed(limit + 1, factory=test_data.factory("PUT"))
+        check.no_errors(summary.errors)
+        if summary.limit_reached:
+            check.base_complex_check(summary.limit_response, 400, schema="error")
+            check.data_contain_str(summary.limit_response.content["error"], str(limit))
+        upd_name = test_data.fixed_name("Dracula")
         upd_data = {"name": upd_name, "other_aliases": "UPD by PUT test"}
         allure.dynamic.title(f"Update character '{upd_name}' (PUT) with DB limit ({limit})")
         data_before = api.get_character_by_name(upd_name).content.get("result")
         data_before.update(upd_data)
         response = api.put_character(upd_data)
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
         curr_data = api.get_character_by_name(upd_name).content.get("result")
         check.matching_data(curr_data, data_before)
 
     @allure.description("Check PUT CHARACTER with double update the same fields. "
                         "Expect status code 200 and correct response")
-    def test_double_update(self, api, fake):
-        schema = {
-            "result": {
-                "type": "dict",
-                "schema": {
-                    "education": {"type": "string"},
-                    "height": {"type": "number"},
-                    "weight": {"type": "number"},
-                    "identity": {"type": "string"},
-                    "name": {"type": "string"},
-                    "other_aliases": {"type": "string"},
-                    "universe": {"type": "string"}
-                }
-            }
-        }
-        upd_name = "Dracula"
+    def test_double_update(self, api, test_data):
+        upd_name = test_data.fixed_name("Dracula")
         allure.dynamic.title(f"Double update character '{upd_name}'")
         character_data = {"name": upd_name, "universe": "UPD by PUT test"}
         response = api.put_character(character_data)
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
         response = api.put_character(character_data)
-        check.base_complex_check(response, 200, schema=schema)
+        check.base_complex_check(response, 200, schema="character")
 
     @allure.description("Test for PUT CHARACTER method for duplicate characters"
                         "Check response structure, data types and response time."
                         "Expected status code 200. All records must be updated")
-    def test_update_duplicate_character(self, api, fake):
-        collection = api.get_all_characters().content.get("result")
-        duplicate_name, count = get_first_duplicate_name(collection)
+    @pytest.mark.whole_collection
+    def test_update_duplicate_character(self, api):
+        collection = CharacterCollection.from_response(api.get_all_characters())
+        duplicate_name, count = collection.first_duplicate()
         allure.dynamic.title(f"Update duplicate character with name '{duplicate_name}' ({count} times)")
 
         upd_education = "UPD by PUT test (duplicate)"
         response = api.put_character({"name": duplicate_name, "education": upd_education})
         check.base_complex_check(response, 200)
 
-        collection = api.get_all_characters().content.get("result")
-        duplicated_records = get_duplicated_records(collection, duplicate_name)
-        for record in duplicated_records:
+        collection = CharacterCollection.from_response(api.get_all_characters())
+        for record in collection.get(duplicate_name):
             check.matching_data(curr_data={"name": record["name"], "education": record["education"]},
                                 expected_data={"name": duplicate_name, "education": upd_education})
 
     @allure.description("Test for PUT CHARACTER method with bad input json (string fields)"
                         "Check response structure, data types and response time."
                         "Expected status code 400")
-    @pytest.mark.parametrize("bad_field_names", [
+    @RequestBatch.nested("bad_field_names, bad_value", [[
         ("other_aliases",),
         ("universe",),
         ("education",),
         ("identity",),
         ("universe", "other_aliases", "education", "identity")
-    ])
-    @pytest.mark.parametrize("bad_value", [
+    ], [
         'A' * (2 ** 10),
         123,
         -10,
         "!?;:/|@#$%^&*_-+=~<>±§"
-    ])
-    def test_bad_field_str(self, api, fake, bad_field_names, bad_value):
-        upd_name = "Dracula"
-        allure.dynamic.title(f"Check update character '{upd_name}' "
-                             f"with bad string fields {bad_field_names}, value: {bad_value}")
-        character_data = {"name": upd_name,
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
-        update_dictionary_single_val(character_data, bad_field_names, bad_value)
-        response = api.put_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+    ]], request=put_bad_fields)
+    def test_bad_field_str(self, batched_response, bad_field_names, bad_value):
+        allure.dynamic.title(f"Check update character with bad string fields {bad_field_names}, value: {bad_value}")
+        check.base_complex_check(batched_response, 400, schema="error")
         for field_name in bad_field_names:
-            check.data_contain_str(response.content["error"], field_name)
+            check.data_contain_str(batched_response.content["error"], field_name)
 
     @allure.description("Test for PUT CHARACTER method with bad input json (numeric fields)"
                         "Check response structure, data types and response time."
                         "Expected status code 400")
-    @pytest.mark.parametrize("bad_field_names", [
+    @RequestBatch.nested("bad_field_names, bad_value", [[
         ("weight",),
         ("height",),
         ("weight", "height")
-    ])
-    @pytest.mark.parametrize("bad_value", [
+    ], [
         'A' * (2 ** 10),
         "!?;:/|@#$%^&*_-+=~<>±§",
         "1 2",
         "123.1a2b3"
-    ])
-    def test_bad_field_numeric(self, api, fake, bad_field_names, bad_value):
-        upd_name = "Dracula"
-        allure.dynamic.title(f"Check add character '{upd_name}' "
-                             f"with bad numeric fields {bad_field_names}, value: {bad_value}")
-        character_data = {"name": upd_name,
-                          "universe": "TestUniverse",
-                          "education": "TestEducation",
-                          "weight": 1,
-                          "height": 2,
-                          "identity": "TestIdentity",
-                          "other_aliases": "TestAliases"}
-        update_dictionary_single_val(character_data, bad_field_names, bad_value)
-        response = api.put_character(character_data)
-        check.base_complex_check(response, 400, schema={"error": {"type": "string"}})
+    ]], request=put_bad_fields)
+    def test_bad_field_numeric(self, batched_response, bad_field_names, bad_value):
+        allure.dynamic.title(f"Check update character with bad numeric fields {bad_field_names}, value: {bad_value}")
+        check.base_complex_check(batched_response, 400, schema="error")
         for field_name in bad_field_names:
-            check.data_contain_str(response.content["error"], field_name)
+            check.data_contain_str(batched_response.content["error"], field_name)